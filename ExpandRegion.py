@@ -1,16 +1,31 @@
-import sublime, sublime_plugin, os
+import sublime, sublime_plugin, os, json, re
 
 try:
+  import document_cache
   import expand_region_handler
-  import utils
+  import literal_index
+  import plugin_settings
+  import search
+  import selection_history
+  import text_window
+  import tracing
 except:
+  from . import document_cache
   from . import expand_region_handler
-  from . import utils
+  from . import literal_index
+  from . import plugin_settings
+  from . import search
+  from . import selection_history
+  from . import text_window
+  from . import tracing
 
 # get the used sublime text version
 _ST3 = sublime.version() >= '3000'
 
 if _ST3:
+  def _add_regions(view, regions):
+    view.sel().add_all(regions)
+
   def _force_enable_soft_undo(view, edit, new_regions):
     # end the current edit
     view.end_edit(edit)
@@ -20,11 +35,14 @@ if _ST3:
     # Hence just use the (invalid) id = -1.
     subedit = view.begin_edit(-1, "expand_region_force_enable_soft_undo")
     try:
-      for sel in new_regions:
-        view.sel().add(sel)
+      _add_regions(view, new_regions)
     finally:
       view.end_edit(subedit)
 else:  # ST2
+  def _add_regions(view, regions):
+    for region in regions:
+      view.sel().add(region)
+
   def _force_enable_soft_undo(view, edit, new_regions):
     # end the current edit
     view.end_edit(edit)
@@ -33,10 +51,174 @@ else:  # ST2
     view.end_edit(subedit)
 
 
-def _detect_language(view, settings_name):
+# the expanded selections of each view, used to shrink them again
+_history = selection_history.SelectionHistory()
+
+
+def _get_buffer_token(view):
+  # identifies the version of the buffer without reading it
+  return "{0}:{1}".format(view.buffer_id(), view.change_count())
+
+
+def _get_history_token(view, persist_history, string=None):
+  if not persist_history:
+    return _get_buffer_token(view)
+  # the buffer id changes between sessions, hence the persisted history is
+  # identified by the content of the buffer
+  if string is None:
+    string = view.substr(sublime.Region(0, view.size()))
+  return expand_region_handler.get_buffer_hash(string)
+
+
+def _load_history(view):
+  settings_json = view.settings().get("expand_region_settings")
+  if settings_json and view.id() not in _history:
+    _history.load(view.id(), json.loads(settings_json))
+
+
+def _store_history(view):
+  data = _history.dump(view.id())
+  view.settings().set("expand_region_settings", json.dumps(data) if data else "")
+
+
+# the number of expansions of each view, a prefetch is discarded if the view
+# was expanded again in the meantime
+_prefetch_generations = {}
+
+
+# the buffer token and the regions of each view as the last expansion or
+# shrink left them, only those are shrunk along the ladders
+_command_regions = {}
+
+
+# the flags python adds to every pattern, sublime's regexes don't need them
+_DEFAULT_REGEX_FLAGS = re.compile("").flags | re.UNICODE
+
+
+class _ViewSearch(object):
+  """Searches the buffer of the view natively instead of the copy of its text
+  (see search.py), as long as the buffer did not change."""
+
+  def __init__(self, view):
+    self.view = view
+    self.change_count = view.change_count()
+    self._spans = {}
+
+  def find_all(self, regex):
+    if regex.flags & ~_DEFAULT_REGEX_FLAGS:
+      return None
+    if self.view.change_count() != self.change_count:
+      return None
+    spans = self._spans.get(regex.pattern)
+    if spans is None:
+      # sublime does not know the python syntax of named groups
+      pattern = regex.pattern.replace("(?P<", "(?<")
+      spans = [(region.begin(), region.end())
+               for region in self.view.find_all(pattern)]
+      self._spans[regex.pattern] = spans
+    return spans
+
+
+# the strings and comments of each view and the change count they belong to
+_literal_indexes = {}
+
+
+def _get_literal_index(view):
+  change_count = view.change_count()
+  cached = _literal_indexes.get(view.id())
+  if cached is not None and cached[0] == change_count:
+    return cached[1]
+  index = literal_index.LiteralIndex(
+    [(region.begin(), region.end()) for region in view.find_by_selector("string")],
+    [(region.begin(), region.end()) for region in view.find_by_selector("comment")])
+  _literal_indexes[view.id()] = (change_count, index)
+  return index
+
+
+def _get_text_buffer(view):
+  settings = plugin_settings.current
+  change_count = view.change_count()
+  token = _get_buffer_token(view)
+
+  def on_text(text):
+    # the data from the view is only valid for the copied version of it
+    if view.change_count() != change_count:
+      return
+    # reuse the data of the previous copy of this version
+    document_cache.bind(text, token)
+    if settings.native_search:
+      search.attach(text, _ViewSearch(view))
+    if settings.scope_literals:
+      document_cache.put(text, "literals", _get_literal_index(view))
+
+  def get_literals():
+    # long lines are not cut inside of strings and comments
+    if settings.scope_literals and view.change_count() == change_count:
+      return _get_literal_index(view)
+    return None
+
+  # the parts of the buffer are only copied if they are needed
+  return text_window.TextBuffer(
+    view.size(), lambda begin, end: view.substr(sublime.Region(begin, end)),
+    on_text, settings.long_line_threshold or None, get_literals, token)
+
+
+def _prefetch(view, language, token, regions, buffer):
+  generation = _prefetch_generations.get(view.id(), 0) + 1
+  _prefetch_generations[view.id()] = generation
+
+  def is_outdated():
+    return (_prefetch_generations.get(view.id()) != generation or
+            _get_buffer_token(view) != token)
+
+  def prefetch():
+    if is_outdated() or _get_regions(view) != regions:
+      return
+    expand_region_handler.prefetch_many(buffer, regions, language, token, is_outdated)
+
+  sublime.set_timeout_async(prefetch, 0)
+
+
+def _get_regions(view):
+  return [(region.begin(), region.end()) for region in view.sel()]
+
+
+# the detected languages by the syntax and the scope at the cursor, the scores
+# of the selectors do only depend on those
+_language_cache = {}
+_LANGUAGE_CACHE_SIZE = 256
+
+
+_SETTINGS_NAMES = ("ExpandRegion.sublime-settings",
+                   "ExpandRegionFallback.sublime-settings")
+
+
+def _update_settings():
+  plugin_settings.update(*[sublime.load_settings(name) for name in _SETTINGS_NAMES])
+  _history.max_depth = plugin_settings.current.selection_history_max_depth
+  tracing.configure(plugin_settings.current.trace_enabled,
+                    plugin_settings.current.trace_size)
+  # the selectors might have changed
+  _language_cache.clear()
+  # the expansions depend on e.g. long_line_threshold and scope_literals
+  expand_region_handler.clear_caches()
+
+
+def plugin_loaded():
+  for name in _SETTINGS_NAMES:
+    settings = sublime.load_settings(name)
+    settings.clear_on_change("expand_region")
+    settings.add_on_change("expand_region", _update_settings)
+  _update_settings()
+
+
+def plugin_unloaded():
+  for name in _SETTINGS_NAMES:
+    sublime.load_settings(name).clear_on_change("expand_region")
+
+
+def _detect_language(view, selectors):
   point = view.sel()[0].b
-  settings = sublime.load_settings(settings_name + ".sublime-settings")
-  selectors = settings.get("scope_selectors")
   def maximal_score(scopes):
     if not scopes:  # validity check
       return 0
@@ -51,39 +233,83 @@ def _detect_language(view, settings_name):
   return language
 
 
+def _get_language(view):
+  point = view.sel()[0].b
+  # the whole scope is used and not only the top level scope, because
+  # languages might be embedded, e.g. source.js inside of text.html
+  key = (view.settings().get("syntax"), view.scope_name(point))
+  language = _language_cache.get(key)
+  if language is None:
+    settings = plugin_settings.current
+    language = (_detect_language(view, settings.scope_selectors) or
+                _detect_language(view, settings.fallback_scope_selectors) or "")
+    if len(_language_cache) >= _LANGUAGE_CACHE_SIZE:
+      _language_cache.clear()
+    _language_cache[key] = language
+  return language
+
+
 class ExpandRegionCommand(sublime_plugin.TextCommand):
-  def run(self, edit, language="", undo=False, debug=True):
+  def run(self, edit, language="", undo=False, debug=False):
     view = self.view
-    utils.is_debug_enabled = debug
+    settings = plugin_settings.current
+    if debug and not tracing.enabled:
+      # stays enabled until the settings change
+      tracing.configure(True, settings.trace_size)
+    # the history is only written into the view settings if it should be
+    # persisted
+    persist_history = settings.persist_selection_history
 
     if (undo):
-      string = view.substr(sublime.Region(0, view.size()))
-      start = view.sel()[0].begin()
-      end = view.sel()[0].end()
-      result = expand_region_handler.undo(string, start, end, view.settings())
-      if (result):
+      if persist_history:
+        _load_history(view)
+      regions = _get_regions(view)
+      token = _get_history_token(view, persist_history)
+      previous_regions = _history.pop(view.id(), token, regions)
+      if persist_history:
+        _store_history(view)
+      buffer_token = _get_buffer_token(view)
+      if (not previous_regions and
+          _command_regions.get(view.id()) == (buffer_token, regions)):
+        # the regions of the last expansion might still be on the ladders, a
+        # selection made by hand is not shrunk even if it is on a ladder
+        previous_regions = expand_region_handler.shrink_many(
+          regions, language or _get_language(view), buffer_token)
+        if None in previous_regions:
+          previous_regions = None
+      if previous_regions:
         view.sel().clear()
-        view.sel().add(sublime.Region(result["start"], result["end"]))
+        _add_regions(view, [sublime.Region(start, end) for start, end in previous_regions])
+        _command_regions[view.id()] = (buffer_token, _get_regions(view))
       return
 
     if not language:
-      language = (_detect_language(view, "ExpandRegion") or
-                  _detect_language(view, "ExpandRegionFallback"))
-    if debug:
-      print("ExpandRegion, ExpandRegion.py, Determined language: '{0}'".format(language))
+      language = _get_language(view)
+    if tracing.enabled:
+      tracing.record("language", language=language)
+
+    # expand all selections against the same buffer, it only reads the parts
+    # of the buffer, which are needed and nothing if the expansions are known
+    buffer = _get_text_buffer(view)
+    regions = _get_regions(view)
+    if settings.async_expansion:
+      results = expand_region_handler.expand_many_within(
+        buffer, regions, language, _get_buffer_token(view),
+        settings.expansion_time_budget_ms / 1000.0)
+    else:
+      results = expand_region_handler.expand_many(buffer, regions, language,
+                                                  token=_get_buffer_token(view))
+
+    if results is None:
+      # the time budget was exceeded, the selection is kept unchanged, hence
+      # the next press finds the result of the worker for the same regions
+      return
 
     new_regions = []
     is_region_expanded = True
-    for region in self.view.sel():
-      string = self.view.substr(sublime.Region(0, self.view.size()))
-      start = region.begin()
-      end = region.end()
-
-      result = expand_region_handler.expand(string, start, end, language, self.view.settings())
+    for result in results:
       if result:
         new_regions.append(sublime.Region(result["start"], result["end"]))
-        if debug:
-          print("ExpandRegion, ExpandRegion.py, startIndex: {0}, endIndex: {1}, type: {2}".format(result["start"], result["end"], result["type"]))
       else:
         # if there is no result, call the built-in sublime text expand_selection to scope command
         is_region_expanded = False
@@ -91,20 +317,48 @@ class ExpandRegionCommand(sublime_plugin.TextCommand):
     if is_region_expanded:
       # replace the selections with the new regions
       view.sel().clear()
-      for sel in new_regions:
-        view.sel().add(sel)
+      _add_regions(view, new_regions)
 
-      settings = sublime.load_settings("ExpandRegion.sublime-settings")
-      do_force_enable_soft_undo = settings.get("force_soft_undo_integration")
-      if do_force_enable_soft_undo:
+      # record the selection as it is after sublime merged overlapping regions
+      if persist_history:
+        _load_history(view)
+      token = _get_history_token(view, persist_history,
+                                 buffer.text() if persist_history else None)
+      _history.push(view.id(), token, regions, _get_regions(view))
+      _command_regions[view.id()] = (_get_buffer_token(view), _get_regions(view))
+      if persist_history:
+        _store_history(view)
+
+      if _ST3 and settings.prefetch_expansions:
+        _prefetch(view, language, _get_buffer_token(view), _get_regions(view), buffer)
+
+      if settings.force_soft_undo_integration:
         _force_enable_soft_undo(view, edit, new_regions)
     else:
-      if debug:
-        print( "ExpandRegion, ExpandRegion.py, calling Sublime Text expand_selection to scope..." )
+      if tracing.enabled:
+        tracing.record("fallback", command="expand_selection", to="scope")
       view.run_command( "expand_selection", {"to": "scope"} )
 
 
+class ExpandRegionDumpTraceCommand(sublime_plugin.WindowCommand):
+  def run(self):
+    view = self.window.new_file()
+    view.set_scratch(True)
+    view.set_name("ExpandRegion Trace")
+    if tracing.enabled:
+      lines = tracing.format_events()
+    else:
+      lines = ['Tracing is disabled, set "trace_enabled" in the ExpandRegion settings.']
+    view.run_command("append", {"characters": "\n".join(lines) + "\n"})
+
+
 class ExpandRegionContext(sublime_plugin.EventListener):
+    def on_close(self, view):
+      _history.discard(view.id())
+      _prefetch_generations.pop(view.id(), None)
+      _command_regions.pop(view.id(), None)
+      _literal_indexes.pop(view.id(), None)
+
     def on_query_context(self, view, key, *args):
       if key == "expand_region_soft_undo":
         item = view.command_history(0)
@@ -112,3 +366,8 @@ class ExpandRegionContext(sublime_plugin.EventListener):
           return True
 
       return None
+
+
+# ST2 does not call plugin_loaded
+if not _ST3:
+  plugin_loaded()
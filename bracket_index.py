@@ -0,0 +1,107 @@
+from array import array
+from bisect import bisect_left
+
+# The matching bracket pairs of a document.
+#
+# The index is built in one pass over the tokens of the document, i.e. the
+# brackets and optionally other symbols (the break symbols of the semantic
+# units). It is only valid if all brackets are balanced and properly nested,
+# the expansions scan the document otherwise. The pairs and the other symbols
+# are stored by their nesting level, hence the innermost pair around a
+# position or the next symbol on the same level are found with binary
+# searches.
+
+_COUNTERPARTS = {")": "(", "]": "[", "}": "{"}
+
+
+def find_tokens(string, regex, is_masked=None):
+  """Returns the (position, symbol) pairs of the matches of the regex, which
+  are not masked, in the order of the document."""
+  tokens = []
+  for m in regex.finditer(string):
+    pos = m.start()
+    if is_masked is None or not is_masked(pos):
+      tokens.append((pos, m.group()))
+  return tokens
+
+
+class BracketIndex(object):
+  __slots__ = ("is_valid", "opens", "closes", "_level_opens", "_level_closes",
+               "_level_symbols")
+
+  def __init__(self, tokens):
+    self.is_valid = False
+    self.opens = array("l")
+    self.closes = array("l")
+    self._level_opens = []
+    self._level_closes = []
+    self._level_symbols = []
+
+    # the positions and kinds of the open brackets
+    stack = []
+    # the matched pairs of each level, by the position of the open bracket
+    level_pairs = []
+    for pos, symbol in tokens:
+      if symbol in "([{":
+        stack.append((pos, symbol))
+        self.opens.append(pos)
+        continue
+      level = len(stack)
+      if symbol not in _COUNTERPARTS:
+        while len(self._level_symbols) <= level:
+          self._level_symbols.append(array("l"))
+        self._level_symbols[level].append(pos)
+        continue
+      if not stack or stack[-1][1] != _COUNTERPARTS[symbol]:
+        return
+      open_pos = stack.pop()[0]
+      self.closes.append(pos)
+      level -= 1
+      while len(level_pairs) <= level:
+        level_pairs.append([])
+      level_pairs[level].append((open_pos, pos))
+    if stack:
+      return
+
+    for pairs in level_pairs:
+      pairs.sort()
+      self._level_opens.append(array("l", [pair[0] for pair in pairs]))
+      self._level_closes.append(array("l", [pair[1] for pair in pairs]))
+    self.is_valid = True
+
+  def depth(self, pos):
+    """Returns the number of pairs, which are opened before the position and
+    closed at or behind it."""
+    return bisect_left(self.opens, pos) - bisect_left(self.closes, pos)
+
+  def enclosing_pair(self, pos):
+    """Returns the positions (open, close) of the innermost pair, which is
+    opened before the position and closed at or behind it, or None."""
+    level = self.depth(pos) - 1
+    if level < 0:
+      return None
+    opens = self._level_opens[level]
+    i = bisect_left(opens, pos) - 1
+    return opens[i], self._level_closes[level][i]
+
+  def last_symbol(self, level, begin, end):
+    """Returns the position of the last other symbol on the level from begin
+    to end (exclusive) or None."""
+    if level >= len(self._level_symbols):
+      return None
+    symbols = self._level_symbols[level]
+    i = bisect_left(symbols, end) - 1
+    if i >= 0 and symbols[i] >= begin:
+      return symbols[i]
+    return None
+
+  def first_symbol(self, level, begin, end):
+    """Returns the position of the first other symbol on the level from begin
+    to end (exclusive) or None."""
+    if level >= len(self._level_symbols):
+      return None
+    symbols = self._level_symbols[level]
+    i = bisect_left(symbols, begin)
+    if i < len(symbols) and symbols[i] < end:
+      return symbols[i]
+    return None
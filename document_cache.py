@@ -0,0 +1,142 @@
+import threading
+
+# Data which only depends on the document string (masks, indexes, ...) is
+# cached here, so expanding many selections against one snapshot of the buffer
+# computes it only once.
+#
+# Documents are looked up by identity and not by value: comparing or hashing a
+# multi-megabyte string would cost as much as recomputing the data. The cache
+# holds a reference to every string it knows, hence an identical object can't
+# be a different document.
+#
+# Every expansion in sublime copies the buffer into a new string. If the copy
+# is bound to the version of the buffer (see bind), it takes over the data of
+# the previous copy of the same version.
+#
+# Indexes of the whole document cost its length to build, while a scan around
+# a selection often examines only a few lines. Such an index is only built
+# once the scans of the document examined as many characters as it has (see
+# get_when_paid_off), hence a document costs at most twice the scans alone.
+
+# short strings (e.g. a single line) are cheap to scan and would only push the
+# real documents out of the cache
+_MIN_LENGTH = 2048
+_MAX_DOCUMENTS = 4
+# the entries counting the scanned characters are keyed by (_SCANNED, key)
+_SCANNED = "scanned"
+
+# list of [string, entries, version] lists, the most recently used is the last
+# one
+_documents = []
+# the prefetch thread builds data too, the list is only changed with the lock
+_lock = threading.Lock()
+
+
+def _get_entries(string):
+  for i in range(len(_documents) - 1, -1, -1):
+    document = _documents[i]
+    if document[0] is string:
+      if i != len(_documents) - 1:
+        del _documents[i]
+        _documents.append(document)
+      return document[1]
+
+  entries = {}
+  _documents.append([string, entries, None])
+  if len(_documents) > _MAX_DOCUMENTS:
+    del _documents[0]
+  return entries
+
+
+def bind(string, version):
+  """Marks the string as the text of the version (e.g. the buffer id and the
+  change count of a view). The string takes over the data of another string
+  with the same version."""
+  if len(string) < _MIN_LENGTH:
+    return
+  with _lock:
+    for document in _documents:
+      if document[2] == version and document[0] is not string:
+        # the text is the same, only the old copy is released
+        _documents[:] = [d for d in _documents if d[0] is not string]
+        document[0] = string
+        break
+    _get_entries(string)
+    _documents[-1][2] = version
+
+
+def get(string, key, build):
+  """returns the cached value for the key or calls build(string) to create it"""
+  if len(string) < _MIN_LENGTH:
+    return build(string)
+
+  with _lock:
+    entries = _get_entries(string)
+    if key in entries:
+      return entries[key]
+  # build without the lock, another thread might build the same value, the
+  # first one is kept
+  value = build(string)
+  with _lock:
+    return entries.setdefault(key, value)
+
+
+def put(string, key, value):
+  """stores the value for the key, short strings are not cached"""
+  if len(string) < _MIN_LENGTH:
+    return
+  with _lock:
+    _get_entries(string)[key] = value
+
+
+def get_when_paid_off(string, key, build):
+  """Returns the cached value for the key or calls build(string) to create it,
+  if the scans of the string, which did without it, examined as many
+  characters as the string has. Returns None otherwise, the callers scan and
+  count the examined characters with add_scanned."""
+  if len(string) < _MIN_LENGTH:
+    return None
+  with _lock:
+    entries = _get_entries(string)
+    if key in entries:
+      return entries[key]
+    if entries.get((_SCANNED, key), 0) < len(string):
+      return None
+  value = build(string)
+  with _lock:
+    return entries.setdefault(key, value)
+
+
+def add_scanned(string, key, count):
+  """Adds the number of characters a scan examined instead of using the value
+  of the key, see get_when_paid_off"""
+  if len(string) < _MIN_LENGTH:
+    return
+  with _lock:
+    entries = _get_entries(string)
+    entries[(_SCANNED, key)] = entries.get((_SCANNED, key), 0) + count
+
+
+def peek(string, key):
+  """returns the cached value for the key or None, an unknown string is not
+  added to the cache"""
+  with _lock:
+    for document in _documents:
+      if document[0] is string:
+        return document[1].get(key)
+  return None
+
+
+def peek_version(version, key):
+  """returns the cached value for the key of the string bound to the version
+  (see bind) or None, hence the string is not needed"""
+  with _lock:
+    for document in _documents:
+      if document[2] == version:
+        return document[1].get(key)
+  return None
+
+
+def clear():
+  with _lock:
+    del _documents[:]
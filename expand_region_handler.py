@@ -1,53 +1,263 @@
-import re, hashlib, json
+import re, hashlib, json, threading
 
 try:
-  import javascript
-  import html
-  import latex
-  import python
-  import utils
+  import document_cache
+  import expansion_ladder
+  import string_index
+  import text_window
+  import tracing
 except:
-  from . import javascript
-  from . import html
-  from . import latex
-  from . import python
-  from . import utils
+  from . import document_cache
+  from . import expansion_ladder
+  from . import string_index
+  from . import text_window
+  from . import tracing
 
 
-def expand(string, start, end, language="", settings=None):
+# the expansions of the recent document versions, identified by their tokens
+_ladders = expansion_ladder.LadderCaches()
 
-  if language == "html":
-    result = html.expand(string, start, end)
-  elif language == "latex":
-    result = latex.expand(string, start, end)
-  elif language == "python":
-    result = python.expand(string, start, end)
+
+# the modules of the languages are imported when they are used first, hence a
+# session which only edits python does not load the latex or xml expansions
+_LANGUAGE_MODULES = {
+  "html": "html",
+  "latex": "latex",
+  "python": "python",
+}
+_DEFAULT_LANGUAGE_MODULE = "javascript"
+
+_language_modules = {}
+
+def _import_module(name):
+  if __package__:
+    # sublime text 3 loads the plugin as package
+    return getattr(__import__("", globals(), None, [name], 1), name)
+  return __import__(name)
+
+def _get_language_module(language):
+  module = _language_modules.get(language)
+  if module is None:
+    name = _LANGUAGE_MODULES.get(language, _DEFAULT_LANGUAGE_MODULE)
+    module = _language_modules[language] = _import_module(name)
+  return module
+
+def _get_string_index(buffer, language):
+  return buffer.get_cached(("string_index", language),
+                           lambda string: string_index.StringIndex(string, language))
+
+def _expand_in_buffer(buffer, start, end, language):
+  # try the expansions within the lines of the selection first, the whole
+  # text is only needed if they don't expand the selection
+  module = _get_language_module(language)
+  window = buffer.line_window(start, end)
+  # the literals of the window are those of the whole text, they are only
+  # looked up if an expansion needs them
+  string_index.attach_part(window.string, window.begin,
+                           lambda language: _get_string_index(buffer, language),
+                           window.content_begin, window.content_end)
+  try:
+    result = module.expand_within_line(window.string, start - window.begin, end - window.begin)
+  except string_index.LiteralOutside:
+    # e.g. the selection is inside of a docstring
+    return module.expand(buffer.text(), start, end)
+  if result:
+    result.move(window.begin)
+    return result
+  return module.expand_beyond_line(buffer.text(), start, end)
+
+def _expand_for_language(string, start, end, language):
+  if isinstance(string, text_window.TextBuffer):
+    return _expand_in_buffer(string, start, end, language)
+  return _get_language_module(language).expand(string, start, end)
+
+def get_buffer_hash(string):
+  """Hash of the document, used to identify its version if the caller can't
+  provide a cheaper token (e.g. the buffer id and change count of a view)."""
+  if not isinstance(string, bytes):
+    string = string.encode('utf-8')
+  return hashlib.md5(string).hexdigest()
+
+def _trace_expand(language, start, end, result, start_time):
+  duration = (tracing.clock() - start_time) * 1000
+  if result:
+    tracing.record("expand", language=language, region=(start, end),
+                   result=(result["start"], result["end"]), type=result["type"],
+                   steps=result.get("expand_stack"), ms=duration)
   else:
-    result = javascript.expand(string, start, end)
+    tracing.record("expand", language=language, region=(start, end),
+                   result=None, ms=duration)
+
+def _expand(string, start, end, language):
+  if tracing.enabled:
+    start_time = tracing.clock()
+
+  result = _expand_for_language(string, start, end, language)
+
+  if tracing.enabled:
+    _trace_expand(language, start, end, result, start_time)
+  return result
+
+def _add_to_settings_stack(settings, string, result, start, end, token):
+  expand_region_settings = settings.get("expand_region_settings")
+  newSettingsJson = add_to_stack(expand_region_settings, string, result.get("start"), result.get("end"), start, end, token)
+  settings.set("expand_region_settings", newSettingsJson)
+
+def _add_to_ladders(ladders, region, result):
+  # the cached results must not keep the copies of the document alive
+  ladders.add(region, result and result.detached())
+
+def expand(string, start, end, language="", settings=None, token=None):
+
+  result = _expand(string, start, end, language)
 
   if (result != None and settings):
-    expand_region_settings = settings.get("expand_region_settings")
-    newSettingsJson = add_to_stack(expand_region_settings, string.encode('utf-8'), result.get("start"), result.get("end"), start, end)
-    if utils.is_debug_enabled:
-      print("ExpandRegion, expand_region_handler.py, " + newSettingsJson)
-    settings.set("expand_region_settings", newSettingsJson)
+    _add_to_settings_stack(settings, string, result, start, end, token)
 
   return result;
 
-def undo(string, start, end, settings=None):
+def expand_many(string, regions, language="", settings=None, token=None):
+  """Expand all regions, a list of (start, end) tuples, against one snapshot of
+  the document. Returns a list with the result (or None) for every region.
+
+  The string may also be a TextBuffer, hence only the needed parts of the
+  document are read. If the token of the document version is given, the
+  expansions are cached."""
+  if token is None:
+    if settings:
+      if isinstance(string, text_window.TextBuffer):
+        token = get_buffer_hash(string.text())
+      else:
+        token = get_buffer_hash(string)
+    # data derived from the document (e.g. the quotes in expand_to_symbols) is
+    # kept in the document_cache and hence computed only once for all regions
+    return [expand(string, start, end, language, settings, token) for start, end in regions]
+
+  ladders = _ladders.get(token, language)
+  results = []
+  for start, end in regions:
+    is_cached, result = ladders.get((start, end))
+    if not is_cached:
+      result = _expand(string, start, end, language)
+      _add_to_ladders(ladders, (start, end), result)
+    elif tracing.enabled:
+      tracing.record("expand_cached", language=language, region=(start, end),
+                     result=result and (result["start"], result["end"]))
+    if (result != None and settings):
+      _add_to_settings_stack(settings, None, result, start, end, token)
+    results.append(result)
+  return results
+
+def _get_snapshot(string):
+  # the worker must not read the live buffer, it might change while the
+  # worker is still running
+  if isinstance(string, text_window.TextBuffer):
+    return text_window.TextBuffer.from_string(string.text())
+  return string
+
+# (token, language) -> (worker, regions, outcome) of the running workers
+_workers = {}
+_workers_lock = threading.Lock()
+
+def expand_many_within(string, regions, language="", token=None, budget=0.1):
+  """Like expand_many, but the expansion runs on a worker thread and is given
+  up after budget seconds. Returns None in that case, the worker finishes in
+  the background and caches its results for the next call.
+
+  The worker expands a snapshot of the text, which is taken by the caller. A
+  document version has at most one worker, a call waits for the running one
+  instead of starting another."""
+  ladders = _ladders.get(token, language)
+  cached = [ladders.get(region) for region in regions]
+  if all(is_cached for is_cached, _ in cached):
+    return [result for _, result in cached]
+
+  key = (token, language)
+  with _workers_lock:
+    pending = _workers.get(key)
+  if pending is not None:
+    start_time = tracing.clock()
+    pending[0].join(budget)
+    if pending[0].is_alive():
+      if tracing.enabled:
+        tracing.record("budget_exceeded", language=language, regions=len(regions),
+                       ms=budget * 1000)
+      return None
+    # the worker might have expanded the same regions
+    cached = [ladders.get(region) for region in regions]
+    if all(is_cached for is_cached, _ in cached):
+      return [result for _, result in cached]
+    budget = max(0, budget - (tracing.clock() - start_time))
+
+  snapshot = _get_snapshot(string)
+  outcome = {}
+  def work():
+    try:
+      outcome["results"] = expand_many(snapshot, regions, language, token=token)
+    except Exception as e:
+      outcome["error"] = e
+    finally:
+      with _workers_lock:
+        if _workers.get(key, (None,))[0] is worker:
+          del _workers[key]
+  worker = threading.Thread(target=work)
+  worker.daemon = True
+  with _workers_lock:
+    _workers[key] = (worker, regions, outcome)
+  worker.start()
+  worker.join(budget)
+
+  if worker.is_alive():
+    if tracing.enabled:
+      tracing.record("budget_exceeded", language=language, regions=len(regions),
+                     ms=budget * 1000)
+    return None
+  if "error" in outcome:
+    raise outcome["error"]
+  return outcome["results"]
+
+def prefetch_many(string, regions, language="", token=None, is_cancelled=None):
+  """Expands the regions into the cache of the document version, hence the
+  following expand_many only has to look them up. Stops as soon as the
+  optional is_cancelled() returns True."""
+  ladders = _ladders.get(token, language)
+  count = 0
+  for start, end in regions:
+    if is_cancelled is not None and is_cancelled():
+      break
+    is_cached, _ = ladders.get((start, end))
+    if not is_cached:
+      _add_to_ladders(ladders, (start, end), _expand(string, start, end, language))
+      count += 1
+  if tracing.enabled:
+    tracing.record("prefetch", language=language, regions=len(regions),
+                   expanded=count)
+
+def shrink_many(regions, language="", token=None):
+  """Returns the regions the regions were expanded from (or None) in the
+  version of the document identified by the token."""
+  ladders = _ladders.get(token, language)
+  return [ladders.shrink(region) for region in regions]
+
+def clear_caches():
+  """Forgets the expansions and the data derived from the documents, e.g.
+  because the settings they depend on changed."""
+  _ladders.clear()
+  document_cache.clear()
+
+def undo(string, start, end, settings=None, token=None):
+  # the string is only needed to hash it, if there is no token
 
   if (settings):
     expand_region_settings = settings.get("expand_region_settings")
-    result = get_last_selection(expand_region_settings, string.encode('utf-8'), start, end)
-    if utils.is_debug_enabled:
-      print("ExpandRegion, expand_region_handler.py, " + result.get("newSettingsJson"))
+    result = get_last_selection(expand_region_settings, string, start, end, token)
     settings.set("expand_region_settings", result.get("newSettingsJson"))
     if (result.get("newSelection") == None):
       return None
     return {"start": result.get("newSelection").get("startIndex"), "end": result.get("newSelection").get("endIndex")}
 
 
-def add_to_stack(settingsJson, string, startIndex, endIndex, oldStartIndex, oldEndIndex):
+def add_to_stack(settingsJson, string, startIndex, endIndex, oldStartIndex, oldEndIndex, token=None):
   if (settingsJson == "" or settingsJson == None):
     settingsJson = '{"stack": [], "hash": ""}'
   settings = json.loads(settingsJson)
@@ -56,7 +266,9 @@ def add_to_stack(settingsJson, string, startIndex, endIndex, oldStartIndex, oldE
     lastStackItem = settings.get("stack")[len(settings.get("stack")) -1]
   else:
     lastStackItem = {"start": -1, "end": -1}
-  stringHash = hashlib.md5(string).hexdigest()
+  # the token identifies the version of the document, the hash is only a
+  # fallback as it has to read the whole document
+  stringHash = token if token is not None else get_buffer_hash(string)
   if (stringHash != settings.get("hash")):
     settings["hash"] = stringHash
     settings["stack"] = [{"start": startIndex, "end": endIndex}]
@@ -67,7 +279,7 @@ def add_to_stack(settingsJson, string, startIndex, endIndex, oldStartIndex, oldE
   newSettingsJson = json.dumps(settings)
   return newSettingsJson
 
-def get_last_selection(settingsJson, string, startIndex, endIndex):
+def get_last_selection(settingsJson, string, startIndex, endIndex, token=None):
   settings = json.loads(settingsJson)
   newSelection = None
   lastStackItem = None
@@ -76,7 +288,9 @@ def get_last_selection(settingsJson, string, startIndex, endIndex):
   else:
     lastStackItem = {"start": -1, "end": -1}
   newSelection = None
-  stringHash = hashlib.md5(string).hexdigest()
+  # the token identifies the version of the document, the hash is only a
+  # fallback as it has to read the whole document
+  stringHash = token if token is not None else get_buffer_hash(string)
   if (stringHash != settings.get("hash")):
     settings["hash"] = stringHash
     settings["stack"] = []
@@ -1,31 +1,31 @@
-import re
-
 try:
     # Block it from trying to import something which should not be on the python sys.path
     # https://github.com/hktonylee/SublimeNumberKing/issues/4
     import expand_region_handler
+    import line_index
+    import patterns
     import utils
 except:
+    from . import line_index
+    from . import patterns
     from . import utils
 
 
-_INDENT_RE = re.compile(r"^(?P<spaces>\s*)")
-
-
 def empty_line(string, line):
     return not string[line["start"]:line["end"]].strip()
 
 
 def get_indent(string, line):
     line_str = string[line["start"]:line["end"]]
-    m = _INDENT_RE.match(line_str)
+    m = patterns.get("indent").match(line_str)
     if m is None:  # should never happen
         return 0
     return len(m.group("spaces"))
 
 
 def _expand_to_indent(string, start, end):
-    line = utils.get_line(string, start, end)
+    lines = line_index.get(string)
+    line = lines.get_line(start, end)
     indent = get_indent(string, line)
     start = line["start"]
     end = line["end"]
@@ -35,7 +35,7 @@ def _expand_to_indent(string, start, end):
         pos = before_line["start"] - 1
         if pos <= 0:
             break
-        before_line = utils.get_line(string, pos, pos)
+        before_line = lines.get_line(pos, pos)
         before_indent = get_indent(string, before_line)
         # done if the line has a lower indent
         if not indent <= before_indent and not empty_line(string, before_line):
@@ -50,7 +50,7 @@ def _expand_to_indent(string, start, end):
         pos = after_line["end"] + 1
         if pos >= len(string):
             break
-        after_line = utils.get_line(string, pos, pos)
+        after_line = lines.get_line(pos, pos)
         after_indent = get_indent(string, after_line)
         # done if the line has a lower indent
         if not indent <= after_indent and not empty_line(string, after_line):
@@ -71,7 +71,8 @@ def expand_to_indent(string, start, end):
 
 def py_expand_to_indent(string, start,
                         end):
-    line = utils.get_line(string, start, end)
+    lines = line_index.get(string)
+    line = lines.get_line(start, end)
     indent = get_indent(string, line)
     # we don't expand to indent 0 (whole document)
     if indent == 0:
@@ -89,7 +90,7 @@ def py_expand_to_indent(string, start,
         if pos < 0:
             return None
         # get the indent of the line before
-        before_line = utils.get_line(string, pos, pos)
+        before_line = lines.get_line(pos, pos)
         before_indent = get_indent(string, before_line)
         if not empty_line(string, before_line) and before_indent < indent:
             start = before_line["start"]
@@ -1,41 +1,21 @@
-import re
-
 try:
   # Block it from trying to import something which should not be on the python sys.path
   # https://github.com/hktonylee/SublimeNumberKing/issues/4
   import expand_region_handler
+  import line_index
+  import patterns
   import utils
 except:
+  from . import line_index
+  from . import patterns
   from . import utils
 
 def expand_to_line(string, startIndex, endIndex):
-  linebreakRe = re.compile(r'\n')
-
-  spacesAndTabsRe = re.compile(r'([ \t]+)')
+  spacesAndTabsRe = patterns.get("spaces_and_tabs")
 
-  searchIndex = startIndex - 1;
-  while True:
-    if searchIndex < 0:
-      newStartIndex = searchIndex + 1
-      break
-    char = string[searchIndex:searchIndex+1]
-    if linebreakRe.match(char):
-      newStartIndex = searchIndex + 1
-      break
-    else:
-      searchIndex -= 1
-
-  searchIndex = endIndex;
-  while True:
-    if searchIndex > len(string) - 1:
-      newEndIndex = searchIndex
-      break
-    char = string[searchIndex:searchIndex+1]
-    if linebreakRe.match(char):
-      newEndIndex = searchIndex
-      break
-    else:
-      searchIndex += 1
+  line = line_index.get(string).get_line(startIndex, endIndex)
+  newStartIndex = line["start"]
+  newEndIndex = line["end"]
 
   s = string[newStartIndex:newEndIndex]
   r = spacesAndTabsRe.match(s)
@@ -1,36 +1,35 @@
-import re
-
 try:
   # Block it from trying to import something which should not be on the python sys.path
   # https://github.com/hktonylee/SublimeNumberKing/issues/4
   import expand_region_handler
+  import string_index
   import utils
 except:
+  from . import string_index
   from . import utils
 
-def expand_to_quotes(string, selection_start, selection_end):
-  quotes_regex = re.compile("(['\"])(?:\\\.|.)*?\\1")
-
-  # iterate over all found quotes pairs
-  for match in quotes_regex.finditer(string):
-    quotes_start = match.start()
-    quotes_end = match.end()
+def _get_quotes_width(string, quotes_start, quotes_end):
+  # """""" is the shortest triple quoted string
+  if(quotes_end - quotes_start >= 6 and
+     string[quotes_start:quotes_start + 3] in ('"""', "'''")):
+    return 3
+  return 1
 
-    # quotes pair end is before selection, stop here and continue loop
-    if quotes_end < selection_start:
-      continue
+def expand_to_quotes(string, selection_start, selection_end, language=None):
+  # the quotes inside of the comments of the language are skipped
+  literals = string_index.get(string, language)
 
-    # quotes pair start is after selection, return, no need to continue loop
-    if quotes_start > selection_end:
-      return None
+  # iterate over the quotes pairs around the selection
+  for quotes_start, quotes_end in literals.find_overlapping(selection_start, selection_end):
 
     # quotes are already selection_end
     if(selection_start == quotes_start and selection_end == quotes_end):
       return None
 
     # the string w/o the quotes, "quotes content"
-    quotes_content_start = quotes_start + 1
-    quotes_content_end = quotes_end - 1
+    quotes_width = _get_quotes_width(string, quotes_start, quotes_end)
+    quotes_content_start = quotes_start + quotes_width
+    quotes_content_end = quotes_end - quotes_width
 
     # "quotes content" is selected, return with quotes
     if(selection_start == quotes_content_start and selection_end == quotes_content_end):
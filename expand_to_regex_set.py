@@ -1,56 +1,32 @@
-try:
-  # Block it from trying to import something which should not be on the python sys.path
-  # https://github.com/hktonylee/SublimeNumberKing/issues/4
-  import expand_region_handler
-  import utils
-except:
-  from . import utils
+import re
 
-def _expand_to_regex_rule(string, startIndex, endIndex, regex, type):
-  # if there is a selection (and not only a blinking cursor)
-  if(startIndex != endIndex):
-    selection = string[startIndex:endIndex]
-    # make sure, that every character of the selection meets the regex rules,
-    # if not return here
-    if len(regex.findall(selection)) != len(selection):
-      return None
+# the regex rules match one character, the run patterns match any number of
+# them, hence a run boundary is found with one match instead of matching every
+# character on its own
+_run_patterns = {}
 
-  # look back
-  searchIndex = startIndex - 1;
-  while True:
-    # begin of string is reached
-    if searchIndex < 0:
-      newStartIndex = searchIndex + 1
-      break
-    char = string[searchIndex:searchIndex+1]
-    # character found, that does not fit into the search set
-    if regex.match(char) is None:
-      newStartIndex = searchIndex + 1
-      break
-    else:
-      searchIndex -= 1
+# the size of the first chunk, which is searched backwards
+_BACKWARD_CHUNK = 64
 
-  # look forward
-  searchIndex = endIndex;
-  while True:
-    # end of string reached
-    if searchIndex > len(string) - 1:
-      newEndIndex = searchIndex
-      break
-    char = string[searchIndex:searchIndex+1]
-    # character found, that does not fit into the search set
-    if regex.match(char) is None:
-      newEndIndex = searchIndex
-      break
-    else:
-      searchIndex += 1
+def get_run_pattern(regex):
+  """Returns the pattern matching a run of the characters the regex matches."""
+  key = (regex.pattern, regex.flags)
+  run = _run_patterns.get(key)
+  if run is None:
+    run = _run_patterns[key] = re.compile("(?:" + regex.pattern + ")*", regex.flags)
+  return run
 
-  try:
-    if startIndex == newStartIndex and endIndex == newEndIndex:
-      return None
-    else:
-      return utils.create_return_obj(newStartIndex, newEndIndex, string, type)
-  except NameError:
-    # newStartIndex or newEndIndex might not have been defined above, because
-    # the character was not found.
-    return None
+def find_run_start(string, index, run):
+  """Returns the start of the run ending at the index."""
+  # python regexes can't search backwards, but the rules only match single
+  # characters, hence the run in the reversed string is the same
+  if index > len(string):
+    return index
+  size = _BACKWARD_CHUNK
+  while True:
+    chunk_start = max(0, index - size)
+    chunk = string[chunk_start:index][::-1]
+    length = run.match(chunk).end()
+    if length < len(chunk) or chunk_start == 0:
+      return index - length
+    size *= 2
@@ -1,21 +1,158 @@
-import re
+from array import array
+from bisect import bisect_left, bisect_right
 
 try:
   # Block it from trying to import something which should not be on the python sys.path
   # https://github.com/hktonylee/SublimeNumberKing/issues/4
   import expand_region_handler
+  import bracket_index
+  import document_cache
+  import literal_index
+  import patterns
+  import string_index
   import utils
 except:
+  from . import bracket_index
+  from . import document_cache
+  from . import literal_index
+  from . import patterns
+  from . import string_index
   from . import utils
 
-# This function definitely sucks and needs a serious rework. Finding semantic
-# units is not that easy. Maybe a parser is needed?
-def expand_to_semantic_unit(string, startIndex, endIndex):
+# The brackets and break symbols of a document, outside of the comments of its
+# language, are found once they pay off (see document_cache.get_when_paid_off),
+# until then the lines around the selection are scanned. A comment bounds the
+# units around it like a break symbol: the units before it end at its first
+# character and the units behind it start behind its last one. The comments
+# may span lines, they are looked up in the string index of the document.
+#
+# If the brackets are balanced, the borders of a semantic unit are looked up
+# in the bracket index by their nesting level. Otherwise the symbols are
+# scanned from the selection, skipping all other characters.
+
+_SPACES = " \t\n"
+_COMMENT_START = "<"
+_COMMENT_END = ">"
+
+def _add_comment_tokens(tokens, comments, start, end):
+  # the tokens of the comments in string[start:end], sorted with the others
+  i = bisect_right(comments.ends, start)
+  while i < len(comments.starts) and comments.starts[i] < end:
+    c_start, c_end = comments.starts[i], comments.ends[i]
+    i += 1
+    if start <= c_start:
+      tokens.append((c_start, _COMMENT_START))
+    if start <= c_end - 1 < end:
+      tokens.append((c_end - 1, _COMMENT_END))
+  tokens.sort()
+
+class _Tokens(object):
+  """The positions and kinds of the symbols of a document."""
+  __slots__ = ("positions", "symbols", "brackets", "comments")
+
+  def __init__(self, string, language=None):
+    self.comments = literal_index.SpanIndex([])
+    if language is not None:
+      self.comments = string_index.get(string, language).comments
+    tokens = bracket_index.find_tokens(
+      string, patterns.get("semantic_unit_symbols"), self.comments.find)
+    _add_comment_tokens(tokens, self.comments, 0, len(string))
+    self.positions = array("l", [pos for pos, symbol in tokens])
+    self.symbols = "".join([symbol for pos, symbol in tokens])
+    self.brackets = bracket_index.BracketIndex(tokens)
+
+  def before(self, index):
+    """Yields the (position, symbol) pairs before the index, backwards."""
+    for i in range(bisect_left(self.positions, index) - 1, -1, -1):
+      yield self.positions[i], self.symbols[i]
+
+  def behind(self, index):
+    """Yields the (position, symbol) pairs at or behind the index."""
+    for i in range(bisect_left(self.positions, index), len(self.positions)):
+      yield self.positions[i], self.symbols[i]
+
+  def find_comment(self, index):
+    """Returns the span of the comment containing the index or None."""
+    return self.comments.find(index)
+
+class _LineScanner(object):
+  """Finds the symbols like _Tokens, but only in the lines it is asked for."""
+  __slots__ = ("string", "key", "comments")
+
+  def __init__(self, string, language, key):
+    self.string = string
+    # the scanned characters are counted for the tokens of the key
+    self.key = key
+    self.comments = literal_index.SpanIndex([])
+    if language is not None:
+      self.comments = string_index.get(string, language).comments
+
+  def _find_tokens(self, start, end):
+    # the symbols in string[start:end], which is part of one line including
+    # its linebreak
+    document_cache.add_scanned(self.string, self.key, end - start)
+    tokens = []
+    for m in patterns.get("semantic_unit_symbols").finditer(self.string, start, end):
+      if self.comments.find(m.start()) is None:
+        tokens.append((m.start(), m.group()))
+    _add_comment_tokens(tokens, self.comments, start, end)
+    return tokens
+
+  def find_comment(self, index):
+    """Returns the span of the comment containing the index or None."""
+    return self.comments.find(index)
+
+  def before(self, index):
+    end = min(index, len(self.string))
+    while end > 0:
+      start = self.string.rfind("\n", 0, end - 1) + 1
+      for token in reversed(self._find_tokens(start, end)):
+        yield token
+      end = start
+
+  def behind(self, index):
+    start = index
+    while start < len(self.string):
+      end = self.string.find("\n", start) + 1 or len(self.string)
+      for token in self._find_tokens(start, end):
+        yield token
+      start = end
+
+def _get_tokens(string, language):
+  """Returns the tokens of the document, or a line scanner as long as finding
+  them would not pay off."""
+  key = ("semantic_unit_tokens", language)
+  tokens = document_cache.get_when_paid_off(
+    string, key, lambda string: _Tokens(string, language))
+  if tokens is None:
+    return _LineScanner(string, language, key)
+  return tokens
+
+def _find_borders_in_index(brackets, length, startIndex, endIndex):
+  # the unit starts behind the break symbol or the open bracket before the
+  # selection on the same level
+  level = brackets.depth(startIndex)
+  pair = brackets.enclosing_pair(startIndex)
+  lower = pair[0] if pair else -1
+  breakIndex = brackets.last_symbol(level, lower + 1, startIndex)
+  newStartIndex = (lower if breakIndex is None else breakIndex) + 1
+
+  # and ends at the break symbol or the close bracket behind the selection
+  level = brackets.depth(endIndex)
+  pair = brackets.enclosing_pair(endIndex)
+  upper = pair[1] if pair else length
+  breakIndex = brackets.first_symbol(level, endIndex, upper)
+  if breakIndex is not None:
+    return newStartIndex, breakIndex
+  if pair:
+    return newStartIndex, upper
+  return None
+
+def _find_borders_by_scan(tokens, startIndex, endIndex):
   symbols = "([{)]}"
   breakSymbols = ",;=&|\n"
-  lookBackBreakSymbols = breakSymbols + "([{"
-  lookForwardBreakSymbols = breakSymbols + ")]}"
-  symbolsRe = re.compile(r'(['+re.escape(symbols)+re.escape(breakSymbols)+'])')
+  lookBackBreakSymbols = breakSymbols + "([{" + _COMMENT_END
+  lookForwardBreakSymbols = breakSymbols + ")]}" + _COMMENT_START
 
   counterparts = {
     "(":")",
@@ -28,66 +165,60 @@ def expand_to_semantic_unit(string, startIndex, endIndex):
 
   symbolStack = []
 
-  searchIndex = startIndex - 1;
-  while True:
-    if(searchIndex < 0):
-      newStartIndex = searchIndex + 1
+  newStartIndex = 0
+  for pos, symbol in tokens.before(startIndex):
+    if(symbol in lookBackBreakSymbols and len(symbolStack) == 0):
+      newStartIndex = pos + 1
       break
-    char = string[searchIndex:searchIndex+1]
-    result = symbolsRe.match(char)
-    if result:
-      symbol = result.group()
-
-      if(symbol in lookBackBreakSymbols and len(symbolStack) == 0):
-        newStartIndex = searchIndex + 1
-        break
-
-      if symbol in symbols:
-        if len(symbolStack) > 0 and symbolStack[len(symbolStack) - 1] == counterparts[symbol]:
-          symbolStack.pop()
-        else:
-          symbolStack.append(symbol)
-
-    # print("ExpandRegion, expand_to_semantic_unit.py, " + char + " " + symbolStack)
-    searchIndex -= 1
-
-  searchIndex = endIndex;
-  while True:
-    char = string[searchIndex:searchIndex+1]
-    result = symbolsRe.match(char)
-    if result:
-      symbol = result.group()
-
-      if len(symbolStack) == 0 and symbol in lookForwardBreakSymbols:
-        newEndIndex = searchIndex;
-        break
-
-      if symbol in symbols:
-        if len(symbolStack) > 0 and symbolStack[len(symbolStack) - 1] == counterparts[symbol]:
-          symbolStack.pop()
-        else:
-          symbolStack.append(symbol)
-
-    if searchIndex >= len(string) - 1:
-      return None
 
-    # print("ExpandRegion, latex.py, " + char + " " + symbolStack + " " + searchIndex)
-    searchIndex += 1
+    if symbol in symbols:
+      if len(symbolStack) > 0 and symbolStack[len(symbolStack) - 1] == counterparts[symbol]:
+        symbolStack.pop()
+      else:
+        symbolStack.append(symbol)
 
-  s = string[newStartIndex:newEndIndex]
-  # print( utils )
-  trimResult = utils.trim(s)
-  if trimResult:
-    newStartIndex = newStartIndex + trimResult["start"];
-    newEndIndex = newEndIndex - (len(s) - trimResult["end"]);
+  for pos, symbol in tokens.behind(endIndex):
+    if len(symbolStack) == 0 and symbol in lookForwardBreakSymbols:
+      return newStartIndex, pos
 
-  try:
-    if newStartIndex == startIndex and newEndIndex == endIndex:
-      return None
+    if symbol in symbols:
+      if len(symbolStack) > 0 and symbolStack[len(symbolStack) - 1] == counterparts[symbol]:
+        symbolStack.pop()
+      else:
+        symbolStack.append(symbol)
+
+  # end of string reached
+  return None
+
+# This function definitely sucks and needs a serious rework. Finding semantic
+# units is not that easy. Maybe a parser is needed?
+def expand_to_semantic_unit(string, startIndex, endIndex, language=None):
+  tokens = _get_tokens(string, language)
 
-    if newStartIndex > startIndex or newEndIndex < endIndex:
+  # the units don't reach into comments, nor out of them
+  for index in (startIndex, endIndex):
+    comment = tokens.find_comment(index)
+    if comment is not None and comment[0] < index < comment[1]:
       return None
 
-    return utils.create_return_obj(newStartIndex, newEndIndex, string, "semantic_unit")
-  except NameError:
+  if isinstance(tokens, _Tokens) and tokens.brackets.is_valid:
+    borders = _find_borders_in_index(tokens.brackets, len(string), startIndex, endIndex)
+  else:
+    borders = _find_borders_by_scan(tokens, startIndex, endIndex)
+  if borders is None:
+    return None
+  newStartIndex, newEndIndex = borders
+
+  # trim spaces, tabs and linebreaks
+  while newStartIndex < newEndIndex and string[newStartIndex] in _SPACES:
+    newStartIndex += 1
+  while newEndIndex > newStartIndex and string[newEndIndex - 1] in _SPACES:
+    newEndIndex -= 1
+
+  if newStartIndex == startIndex and newEndIndex == endIndex:
     return None
+
+  if newStartIndex > startIndex or newEndIndex < endIndex:
+    return None
+
+  return utils.create_return_obj(newStartIndex, newEndIndex, string, "semantic_unit")
@@ -1,35 +1,112 @@
-import re
-
 try:
   # Block it from trying to import something which should not be on the python sys.path
   # https://github.com/hktonylee/SublimeNumberKing/issues/4
   import expand_region_handler
+  import bracket_index
+  import document_cache
+  import literal_index
+  import patterns
+  import search
   import utils
 except:
+  from . import bracket_index
+  from . import document_cache
+  from . import literal_index
+  from . import patterns
+  from . import search
   from . import utils
 
-def expand_to_symbols(string, selection_start, selection_end):
+_SYMBOL_PAIR_PATTERNS = {
+  "(": "symbol_pair_parens",
+  ")": "symbol_pair_parens",
+  "[": "symbol_pair_brackets",
+  "]": "symbol_pair_brackets",
+  "{": "symbol_pair_braces",
+  "}": "symbol_pair_braces"
+}
+
+def _get_quotes_mask(string, language=None):
+  # the quoted strings and the comments of the language as sorted spans, a
+  # lookup is a binary search
+  # Example: f+"oob"+bar
+  # starts = [2], ends = [7]
+  quotes_regex = patterns.get_with_comments("symbols_quotes", language)
+  return literal_index.SpanIndex(search.finditer(string, quotes_regex))
+
+def _get_document_mask(string, language):
+  # the quoted strings only depend on the document, share them between all
+  # selections expanded against it
+  return document_cache.get(string, ("symbols_quotes_mask", language),
+                            lambda string: _get_quotes_mask(string, language))
+
+def _get_literal_mask(string, selection_start, selection_end, language):
+  """Returns a function, which returns the masked span containing a position
+  or None. The scans jump over the whole span."""
+  # use the strings and comments known by the editor, if they are attached
+  literals = document_cache.peek(string, "literals")
+  if literals is not None:
+    return literals.get_mask(selection_start, selection_end)
+  return _get_document_mask(string, language).find
+
+def _get_unclosed_symbols(symbols, counterparts):
+  # a symbol is "closed", if the same number of counterparts is in the
+  # selection. The first ones of both kinds close each other, hence the last
+  # ones of the more frequent kind remain.
+  counts = {}
+  for symbol in symbols:
+    counts[symbol] = counts.get(symbol, 0) + 1
+  remaining = {}
+  for symbol, count in counts.items():
+    remaining[symbol] = count - min(count, counts.get(counterparts[symbol], 0))
+
+  unclosed = []
+  for symbol in reversed(symbols):
+    if remaining[symbol] > 0:
+      remaining[symbol] -= 1
+      unclosed.append(symbol)
+  unclosed.reverse()
+  return unclosed
+
+def _get_bracket_index(string, language):
+  # the mask of the whole document, i.e. without a selected literal
+  literals = document_cache.peek(string, "literals")
+  if literals is not None:
+    is_masked = literals.find_literal
+  else:
+    is_masked = _get_document_mask(string, language).find
+  tokens = bracket_index.find_tokens(string, patterns.get("symbols"), is_masked)
+  return bracket_index.BracketIndex(tokens)
+
+def _expand_with_index(string, selection_start, selection_end, language):
+  """Returns (True, result) if the bracket index could be used and (False,
+  None) otherwise. The index can not be used for unbalanced documents, if the
+  selection is inside of a string known from the scopes (its content is not
+  masked) or if a bracket in the selection has its counterpart outside. The
+  index is only built once it pays off (see document_cache)."""
+  literals = document_cache.peek(string, "literals")
+  if literals is not None and literals.find_literal(selection_start) is not None:
+    return False, None
+  index = document_cache.get_when_paid_off(
+    string, ("bracket_index", language),
+    lambda string: _get_bracket_index(string, language))
+  if index is None or not index.is_valid:
+    return False, None
+  pair = index.enclosing_pair(selection_start)
+  if pair != index.enclosing_pair(selection_end):
+    return False, None
+  if pair is None:
+    return True, None
+  symbols_start = pair[0] + 1
+  symbols_end = pair[1]
+  if(selection_start == symbols_start and selection_end == symbols_end):
+    return True, utils.create_return_obj(symbols_start - 1, symbols_end + 1, string, "symbol")
+  else:
+    return True, utils.create_return_obj(symbols_start, symbols_end, string, "symbol")
+
+def expand_to_symbols(string, selection_start, selection_end, language=None):
   opening_symbols = "([{";
   closing_symbols = ")]}";
-  symbols_regex = re.compile("[" + re.escape(opening_symbols + closing_symbols)+"]")
-
-  quotes_regex = re.compile("(['\"])(?:\\1|.*?\\1)")
-  quotes_blacklist = {}
-
-  # get all quoted strings and create dict with key of index = True
-  # Example: f+"oob"+bar
-  # quotes_blacklist = {
-  #   2: true, 3: true, 4: true, 5: true, 6: true
-  # }
-  for match in quotes_regex.finditer(string):
-    quotes_start = match.start()
-    quotes_end = match.end()
-    i = 0;
-    while True:
-      quotes_blacklist[quotes_start + i] = True
-      i += 1
-      if (quotes_start + i == quotes_end):
-        break;
+  symbols_regex = patterns.get("symbols")
 
   counterparts = {
     "(":")",
@@ -42,31 +119,28 @@ def expand_to_symbols(string, selection_start, selection_end):
 
   # find symbols in selection that are "not closed"
   selection_string = string[selection_start:selection_end]
-  selection_quotes = symbols_regex.findall(selection_string)
+  selection_quotes = _get_unclosed_symbols(
+    symbols_regex.findall(selection_string), counterparts)
+
+  if not selection_quotes:
+    is_indexed, result = _expand_with_index(string, selection_start, selection_end, language)
+    if is_indexed:
+      return result
+
+  # skip the strings and the comments of the language
+  is_masked = _get_literal_mask(string, selection_start, selection_end, language)
+  index_key = ("bracket_index", language)
 
   backward_symbols_stack = []
   forward_symbols_stack = []
 
-  if(len(selection_quotes) != 0):
-    inspect_index = 0
-    # remove symbols that have a counterpart, i.e. that are "closed"
-    while True:
-      item = selection_quotes[inspect_index]
-      if(counterparts[item] in selection_quotes):
-        del selection_quotes[selection_quotes.index(item)]
-        del selection_quotes[selection_quotes.index(counterparts[item])]
-      else:
-        inspect_index = inspect_index + 1
-      if(inspect_index >= len(selection_quotes)):
-        break;
-
-    # put the remaining "open" symbols in the stack lists depending if they are
-    # opening or closing symbols
-    for item in selection_quotes:
-      if(item in opening_symbols):
-        forward_symbols_stack.append(item)
-      elif(item in closing_symbols):
-        backward_symbols_stack.append(item)
+  # put the remaining "open" symbols in the stack lists depending if they are
+  # opening or closing symbols
+  for item in selection_quotes:
+    if(item in opening_symbols):
+      forward_symbols_stack.append(item)
+    elif(item in closing_symbols):
+      backward_symbols_stack.append(item)
 
   search_index = selection_start - 1;
 
@@ -74,11 +148,13 @@ def expand_to_symbols(string, selection_start, selection_end):
   while True:
     # begin of string reached
     if(search_index < 0):
+      document_cache.add_scanned(string, index_key, selection_end)
       return None
 
-    # skip if current index is within a quote
-    if (quotes_blacklist.get(search_index, False) == True):
-      search_index -= 1
+    # skip the quote containing the current index
+    masked_span = is_masked(search_index)
+    if masked_span:
+      search_index = masked_span[0] - 1
       continue;
     character = string[search_index:search_index + 1]
     result = symbols_regex.match(character)
@@ -99,7 +175,7 @@ def expand_to_symbols(string, selection_start, selection_end):
 
     search_index -= 1
 
-  symbol_pair_regex = re.compile("[" + re.escape(symbol + counterparts[symbol]) + "]")
+  symbol_pair_regex = patterns.get(_SYMBOL_PAIR_PATTERNS[symbol])
 
   forward_symbols_stack.append(symbol)
 
@@ -107,9 +183,10 @@ def expand_to_symbols(string, selection_start, selection_end):
 
   # look forward from end of selection
   while True:
-    # skip if current index is within a quote
-    if (quotes_blacklist.get(search_index, False) == True):
-      search_index += 1
+    # skip the quote containing the current index
+    masked_span = is_masked(search_index)
+    if masked_span:
+      search_index = masked_span[1]
       continue;
     character = string[search_index:search_index + 1]
     result = symbol_pair_regex.match(character)
@@ -129,10 +206,13 @@ def expand_to_symbols(string, selection_start, selection_end):
 
     # end of string reached
     if search_index == len(string):
+      document_cache.add_scanned(string, index_key, search_index - symbols_start)
       return
 
     search_index += 1
 
+  document_cache.add_scanned(string, index_key, symbols_end - symbols_start + 2)
+
   if(selection_start == symbols_start and selection_end == symbols_end):
     return utils.create_return_obj(symbols_start - 1, symbols_end + 1, string, "symbol")
   else:
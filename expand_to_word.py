@@ -1,11 +1,7 @@
-import re
-
 try:
-  import expand_to_regex_set
+  import word_spans
 except:
-  from . import expand_to_regex_set
+  from . import word_spans
 
 def expand_to_word(string, startIndex, endIndex):
-  regex = re.compile(r"[\w$]", re.UNICODE);
-
-  return expand_to_regex_set._expand_to_regex_rule(string, startIndex, endIndex, regex, "word")
\ No newline at end of file
+  return word_spans.WordSpans(string, startIndex, endIndex).word()
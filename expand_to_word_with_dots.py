@@ -1,11 +1,7 @@
-import re
-
 try:
-  import expand_to_regex_set
+  import word_spans
 except:
-  from . import expand_to_regex_set
+  from . import word_spans
 
 def expand_to_word_with_dots(string, startIndex, endIndex):
-  regex = re.compile("[a-zA-Z0-9_$.]");
-
-  return expand_to_regex_set._expand_to_regex_rule(string, startIndex, endIndex, regex, "word_with_dots")
\ No newline at end of file
+  return word_spans.WordSpans(string, startIndex, endIndex).word_with_dots()
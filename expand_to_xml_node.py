@@ -1,11 +1,13 @@
-import re
-
 try:
   # Block it from trying to import something which should not be on the python sys.path
   # https://github.com/hktonylee/SublimeNumberKing/issues/4
   import expand_region_handler
+  import patterns
+  import search
   import utils
 except:
+  from . import patterns
+  from . import search
   from . import utils
 
 def expand_to_xml_node(string, start, end):
@@ -14,14 +16,12 @@ def expand_to_xml_node(string, start, end):
   if tag_properties:
     tag_name = tag_properties["name"]
     if tag_properties["type"] == "closing":
-      stringStartToTagStart = string[:start]
-      openingTagPosition = find_tag(stringStartToTagStart, "backward", tag_name)
+      openingTagPosition = find_tag(string, "backward", tag_name, 0, start)
       if openingTagPosition:
         return utils.create_return_obj(openingTagPosition["start"], end, string, "complete_node")
     # if it's a opening tag, find opening tag and return positions
     elif tag_properties["type"] == "opening":
-      stringNodeEndToStringEnd = string[end:]
-      closingTagPosition = find_tag(stringNodeEndToStringEnd, "forward", tag_name)
+      closingTagPosition = find_tag(string, "forward", tag_name, end)
       if closingTagPosition:
         return utils.create_return_obj(start, end + closingTagPosition["end"], string, "complete_node")
     # else it's self closing and there is no matching tag
@@ -37,12 +37,10 @@ def expand_to_xml_node(string, start, end):
     else:
       return utils.create_return_obj(inner_start, inner_end, string, "inner_node")
   # expand selection to the "parent" node of the current selection
-  stringStartToSelectionStart = string[:start]
-  parent_opening_tag = find_tag(stringStartToSelectionStart, "backward")
+  parent_opening_tag = find_tag(string, "backward", "", 0, start)
   if(parent_opening_tag):
     # find closing tag
-    stringNodeEndToStringEnd = string[parent_opening_tag["end"]:]
-    closingTagPosition = find_tag(stringNodeEndToStringEnd, "forward", parent_opening_tag["name"])
+    closingTagPosition = find_tag(string, "forward", parent_opening_tag["name"], parent_opening_tag["end"])
     if closingTagPosition:
       # set positions to content of node, w/o the node tags
       newStart = parent_opening_tag["end"]
@@ -56,8 +54,8 @@ def expand_to_xml_node(string, start, end):
       return utils.create_return_obj(newStart, newEnd, string, "parent_node_content")
 
 def is_within_tag(string, startIndex, endIndex):
-  openingRe = re.compile("<");
-  closingRe = re.compile(">");
+  openingRe = patterns.get("tag_opening")
+  closingRe = patterns.get("tag_closing")
 
   # look back
   searchIndex = startIndex - 1;
@@ -92,14 +90,7 @@ def is_within_tag(string, startIndex, endIndex):
 
 # returns tag name and if tag has a closing slash
 def get_tag_properties(string):
-  regex = re.compile(
-    r"<\s*"
-    r"(?P<closing>\/?)\s*"
-    r"(?P<name>[^\s\/]*)\s*"
-    r"(?:.*?)"
-    r"(?P<self_closing>\/?)\s*"
-    r">"
-  )
+  regex = patterns.get("tag_properties")
   result = regex.match(string)
   if not result:
     return None
@@ -119,11 +110,11 @@ def get_tag_properties(string):
 
   return {"name": tag_name, "type": tag_type}
 
-def find_tag(string, direction, tag_name=""):
+def find_tag(string, direction, tag_name="", pos=0, endpos=None):
   # search for opening and closing tag with a tag_name. If tag_name = "", search
-  # for all tags.
-  regexString = "<\s*" + tag_name + ".*?>|<\/\s*" + tag_name + "\s*>"
-  regex = re.compile(regexString)
+  # for all tags. Only the part from pos to endpos is searched, the positions
+  # are relative to pos.
+  regex = patterns.get_tag(tag_name)
 
   # direction == "forward" implies that we are looking for closing tags (and
   # vice versa
@@ -135,21 +126,21 @@ def find_tag(string, direction, tag_name=""):
   # (opening tag + closing tag).
   symbolStack = []
 
-  result = list(regex.finditer(string))
+  result = list(search.finditer(string, regex, pos, endpos))
 
   # since regex can't run backwards, we reverse the result
   if(direction == "backward"):
     result.reverse()
 
-  for m in result:
-    tag_string = m.group()
+  for tag_start, tag_end in result:
+    tag_string = string[tag_start:tag_end]
     # ignore comments
     if tag_string.startswith("<!--"):
       continue
     tag_type = get_tag_properties(tag_string)["type"]
     if(tag_type == target_tag_type):
       if(len(symbolStack) == 0):
-        return {"start": m.start(), "end": m.end(), "name": get_tag_properties(tag_string)["name"]}
+        return {"start": tag_start - pos, "end": tag_end - pos, "name": get_tag_properties(tag_string)["name"]}
       symbolStack.pop()
     elif(tag_type == target_tag_type_counterpart):
       symbolStack.append(tag_type)
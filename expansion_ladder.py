@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+
+# Every expansion of a selection is the same chain of nested regions, as long
+# as the document does not change. The regions a selection expanded to are
+# kept as a ladder, hence pressing the key again (or shrinking) just climbs the
+# ladder instead of running the expansion chain again.
+#
+# The ladders are also filled from the async thread (prefetching), hence adding
+# a result which is already known does nothing and every access takes the lock
+# of the cache.
+
+
+class ExpansionLadder(object):
+  """The nested regions, regions[i + 1] is the result of expanding
+  regions[i] and results[i] the result object of that expansion."""
+  __slots__ = ("regions", "results", "complete")
+
+  def __init__(self, region):
+    self.regions = [region]
+    self.results = []
+    # the last region can not be expanded any further
+    self.complete = False
+
+
+class LadderCache(object):
+  """The ladders of one version of a document and one language."""
+
+  def __init__(self):
+    # region -> (ladder, index of the region in the ladder)
+    self._rungs = {}
+    self._lock = threading.Lock()
+
+  def get(self, region):
+    """Returns (True, result) if the expansion of the region is known and
+    (False, None) otherwise."""
+    with self._lock:
+      return self._get(region)
+
+  def _get(self, region):
+    rung = self._rungs.get(region)
+    if rung is None:
+      return False, None
+    ladder, index = rung
+    if index < len(ladder.results):
+      return True, ladder.results[index]
+    if ladder.complete:
+      return True, None
+    return False, None
+
+  def add(self, region, result):
+    """Adds the result of expanding the region."""
+    with self._lock:
+      self._add(region, result)
+
+  def _add(self, region, result):
+    rung = self._rungs.get(region)
+    if rung is None:
+      rung = self._rungs[region] = (ExpansionLadder(region), 0)
+    ladder, index = rung
+    if index < len(ladder.results) or ladder.complete:
+      # already known
+      return
+    if result is None:
+      ladder.complete = True
+      return
+    next_region = (result["start"], result["end"])
+    ladder.regions.append(next_region)
+    ladder.results.append(result)
+    # another selection might already have expanded over the same region
+    if next_region not in self._rungs:
+      self._rungs[next_region] = (ladder, index + 1)
+
+  def shrink(self, region):
+    """Returns the region which was expanded to the region or None."""
+    with self._lock:
+      rung = self._rungs.get(region)
+      if rung is None or rung[1] == 0:
+        return None
+      ladder, index = rung
+      return ladder.regions[index - 1]
+
+
+class LadderCaches(object):
+  """The ladder caches of the most recent versions of the documents."""
+
+  def __init__(self, size=8):
+    self.size = size
+    self._caches = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, token, language):
+    key = (token, language)
+    with self._lock:
+      cache = self._caches.pop(key, None)
+      if cache is None:
+        cache = LadderCache()
+        while len(self._caches) >= self.size:
+          self._caches.popitem(last=False)
+      self._caches[key] = cache
+    return cache
+
+  def clear(self):
+    with self._lock:
+      self._caches.clear()
@@ -1,39 +1,46 @@
 try:
-  import expand_to_word
-  import expand_to_subword
   import expand_to_quotes
   import expand_to_xml_node
+  import word_spans
 except:
-  from . import expand_to_word
-  from . import expand_to_subword
   from . import expand_to_quotes
   from . import expand_to_xml_node
+  from . import word_spans
 
 def expand(string, start, end):
+  result = expand_within_line(string, start, end)
+  if result:
+    return result
+  return expand_beyond_line(string, start, end)
+
+def expand_within_line(string, start, end):
+  # these expansions only depend on the lines of the selection
   expand_stack = []
+  spans = word_spans.WordSpans(string, start, end)
 
   expand_stack.append("subword")
 
-  result = expand_to_subword.expand_to_subword(string, start, end)
+  result = spans.subword()
   if result:
     result["expand_stack"] = expand_stack
     return result
 
   expand_stack.append("word")
 
-  result = expand_to_word.expand_to_word(string, start, end)
+  result = spans.word()
   if result:
     result["expand_stack"] = expand_stack
     return result
 
   expand_stack.append("quotes")
 
-  result = expand_to_quotes.expand_to_quotes(string, start, end)
+  result = expand_to_quotes.expand_to_quotes(string, start, end, "html")
   if result:
     result["expand_stack"] = expand_stack
     return result
 
-  expand_stack.append("xml_node")
+def expand_beyond_line(string, start, end):
+  expand_stack = ["subword", "word", "quotes", "xml_node"]
 
   result = expand_to_xml_node.expand_to_xml_node(string, start, end)
   if result:
@@ -1,96 +1,107 @@
 try:
-  import expand_to_word
-  import expand_to_subword
-  import expand_to_word_with_dots
   import expand_to_symbols
   import expand_to_quotes
   import expand_to_semantic_unit
+  import string_index
   import utils
+  import word_spans
 except:
-  from . import expand_to_word
-  from . import expand_to_subword
-  from . import expand_to_word_with_dots
   from . import expand_to_symbols
   from . import expand_to_quotes
   from . import expand_to_semantic_unit
+  from . import string_index
   from . import utils
+  from . import word_spans
 
-def expand(string, start, end):
-  selection_is_in_string = expand_to_quotes.expand_to_quotes(string, start, end)
+def expand(string, start, end, language="javascript"):
+  result = expand_within_line(string, start, end, language)
+  if result:
+    return result
+  return expand_beyond_line(string, start, end, language)
+
+def expand_within_line(string, start, end, language="javascript"):
+  # these expansions only depend on the lines of the selection, hence the
+  # string may also contain just those lines (see text_window)
+  selection_is_in_string = expand_to_quotes.expand_to_quotes(string, start, end, language)
 
   if selection_is_in_string:
+    # the content of a string has no comments
     string_result = expand_agains_string(selection_is_in_string["string"], start - selection_is_in_string["start"], end - selection_is_in_string["start"])
 
     if string_result:
-      string_result["start"] = string_result["start"] + selection_is_in_string["start"]
-      string_result["end"] = string_result["end"] + selection_is_in_string["start"]
-      string_result[string] = string[string_result["start"]:string_result["end"]];
+      string_result.move(selection_is_in_string["start"])
       return string_result
 
   if utils.selection_contain_linebreaks(string, start, end) == False:
 
     line = utils.get_line(string, start, end)
     line_string = string[line["start"]:line["end"]]
-
-    line_result = expand_agains_line(line_string, start - line["start"], end - line["start"])
+    if line_string is not string:
+      # the literals of the line are those of the string
+      string_index.attach_part(line_string, line["start"],
+                               lambda language: string_index.get(string, language))
+
+    try:
+      line_result = expand_agains_line(line_string, start - line["start"], end - line["start"], language)
+    except string_index.LiteralOutside:
+      # a literal spans the line, the one around the selection is expanded to
+      # like within the line, the others are left to the expansions beyond it
+      return selection_is_in_string
 
     if line_result:
-      line_result["start"] = line_result["start"] + line["start"]
-      line_result["end"] = line_result["end"] + line["start"]
-      line_result[string] = string[line_result["start"]:line_result["end"]];
+      line_result.move(line["start"])
       return line_result
 
+def expand_beyond_line(string, start, end, language="javascript"):
   expand_stack = ["semantic_unit"]
 
-  result = expand_to_semantic_unit.expand_to_semantic_unit(string, start, end)
+  result = expand_to_semantic_unit.expand_to_semantic_unit(string, start, end, language)
   if result:
     result["expand_stack"] = expand_stack
     return result
 
   expand_stack.append("symbols")
 
-  result = expand_to_symbols.expand_to_symbols(string, start, end)
+  result = expand_to_symbols.expand_to_symbols(string, start, end, language)
   if result:
     result["expand_stack"] = expand_stack
     return result
 
-  if utils.is_debug_enabled:
-    print("ExpandRegion, javascript.py, None")
-
-def expand_agains_line(string, start, end):
+def expand_agains_line(string, start, end, language="javascript"):
   expand_stack = []
+  spans = word_spans.WordSpans(string, start, end)
 
   expand_stack.append("subword")
 
-  result = expand_to_subword.expand_to_subword(string, start, end)
+  result = spans.subword()
   if result:
     result["expand_stack"] = expand_stack
     return result
 
   expand_stack.append("word")
 
-  result = expand_to_word.expand_to_word(string, start, end)
+  result = spans.word()
   if result:
     result["expand_stack"] = expand_stack
     return result
 
   expand_stack.append("quotes")
 
-  result = expand_to_quotes.expand_to_quotes(string, start, end)
+  result = expand_to_quotes.expand_to_quotes(string, start, end, language)
   if result:
     result["expand_stack"] = expand_stack
     return result
 
   expand_stack.append("semantic_unit")
 
-  result = expand_to_semantic_unit.expand_to_semantic_unit(string, start, end)
+  result = expand_to_semantic_unit.expand_to_semantic_unit(string, start, end, language)
   if result:
     result["expand_stack"] = expand_stack
     return result
 
   expand_stack.append("symbols")
 
-  result = expand_to_symbols.expand_to_symbols(string, start, end)
+  result = expand_to_symbols.expand_to_symbols(string, start, end, language)
   if result:
     result["expand_stack"] = expand_stack
     return result
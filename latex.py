@@ -1,28 +1,19 @@
-import re
 try:
-    import expand_to_regex_set
     import expand_to_symbols
+    import line_index
+    import patterns
+    import search
+    import tracing
     import utils
-    _ST3 = False
+    import word_spans
 except:
-    from . import expand_to_regex_set
     from . import expand_to_symbols
+    from . import line_index
+    from . import patterns
+    from . import search
+    from . import tracing
     from . import utils
-    _ST3 = True
-
-
-_BEGIN_END_REG = re.compile(
-    r"\\(?P<command>begin|end)"
-    r"(?:\[.*\])?"
-    r"\{(?P<name>[^\}]*)\}"
-)
-_EXCLUSIVE_BEGIN_END_REG = re.compile(
-    r"^"
-    r"\\(?P<command>begin|end)"
-    r"(?:\[.*\])?"
-    r"\{(?P<name>[^\}]*)\}"
-    r"$"
-)
+    from . import word_spans
 
 
 def chart_at(string, index):
@@ -33,32 +24,25 @@ def chart_at(string, index):
 
 def expand_to_tex_word(string, start, end):
     """Expand to a valid latex word."""
-    regex = re.compile(r"[a-zA-Z@]", re.UNICODE)
-
-    return expand_to_regex_set._expand_to_regex_rule(
-        string, start, end, regex, "tex_word")
+    return word_spans.WordSpans(string, start, end).tex_word()
 
 
 def _get_closest_env_border(string, start_pos, end_pos, reverse=False):
     open_command = "begin"
     close_command = "end"
-    if _ST3:
-        iterator = _BEGIN_END_REG.finditer(string, pos=start_pos,
-                                           endpos=end_pos)
-        offset = 0
-    else:
-        s = string[start_pos:end_pos]
-        iterator = _BEGIN_END_REG.finditer(s)
-        offset = start_pos
+    regex = patterns.get("latex_begin_end")
+    iterator = search.finditer(string, regex, start_pos, end_pos)
     if reverse:
         iterator = reversed(list(iterator))
         open_command, close_command = close_command, open_command
+    lines = line_index.get(string)
     count = 0
-    for before in iterator:
-        line = utils.get_line(string, before.start(), before.end())
+    for border_start, border_end in iterator:
+        line = lines.get_line(border_start, border_end)
         # ignore comment lines
         if string[line["start"]:line["end"]].strip()[0] == "%":
             continue
+        before = regex.match(string, border_start, border_end)
         command = before.group("command")
         if command == open_command:
             count += 1
@@ -67,14 +51,14 @@ def _get_closest_env_border(string, start_pos, end_pos, reverse=False):
         elif command == close_command:
             # found begin before
             return {
-                "start": offset + before.start(),
-                "end": offset + before.end(),
+                "start": border_start,
+                "end": border_end,
                 "name": before.group("name")
             }
 
 
 def expand_against_matching_env(string, start, end):
-    m = _EXCLUSIVE_BEGIN_END_REG.match(string[start:end])
+    m = patterns.get("latex_exclusive_begin_end").match(string[start:end])
     if not m:
         return None
     if m.group("command") == "begin":
@@ -90,8 +74,9 @@ def expand_against_matching_env(string, start, end):
     if not env_border:
         return None
     if not env_border["name"] == m.group("name"):
-        print("ExpandRegion, latex.py, Environments not matching '{}' and '{}'"
-              .format(env_border["name"], m.group("name")))
+        if tracing.enabled:
+            tracing.record("latex_environment_mismatch",
+                           names=(env_border["name"], m.group("name")))
         return None
     if not reverse:  # search from begin
         start = start
@@ -110,8 +95,9 @@ def expand_against_env(string, start, end):
     if tex_begin is None or tex_end is None:
         return None
     if tex_begin["name"] != tex_end["name"]:
-        print("ExpandRegion, latex.py, Environments not matching '{}' and '{}'"
-              .format(tex_begin["name"], tex_end["name"]))
+        if tracing.enabled:
+            tracing.record("latex_environment_mismatch",
+                           names=(tex_begin["name"], tex_end["name"]))
         return None
     inner_env_selected = start == tex_begin["end"] and end == tex_end["start"]
     if inner_env_selected:
@@ -142,7 +128,7 @@ def _stretch_over_previous_semantic_unit(string, start):
     while chart_at(string, start) == " ":
         start -= 1
     if chart_at(string, start) in ["]", "}"]:
-        r = expand_to_symbols.expand_to_symbols(string, start, start)
+        r = expand_to_symbols.expand_to_symbols(string, start, start, "latex")
         if r is not None:
             return r["start"] - 1
     raise NoSemanticUnit()
@@ -153,7 +139,7 @@ def _stretch_over_next_semantic_unit(string, end):
         end += 1
     if chart_at(string, end) in ["[", "{"]:
         end += 1
-        r = expand_to_symbols.expand_to_symbols(string, end, end)
+        r = expand_to_symbols.expand_to_symbols(string, end, end, "latex")
         if r is not None:
             end = r["end"]
             # special case: '{}' (no content)
@@ -210,7 +196,7 @@ def expand_against_surrounding_command(string, start, end):
 
 def expand_to_inline_math(string, start, end):
     # don't expand if a dollar sign is inside the string
-    if re.search(r"(?:[^\\]|^)\$", string[start:end]):
+    if patterns.get("latex_unescaped_dollar").search(string[start:end]):
         return
 
     line = utils.get_line(string, start, end)
@@ -263,11 +249,20 @@ def _closest_result(result1, result2):
 
 
 def expand(string, start, end):
+    result = expand_within_line(string, start, end)
+    if result:
+        return result
+    return expand_beyond_line(string, start, end)
+
+
+def expand_within_line(string, start, end):
+    # these expansions only depend on the lines of the selection
     expand_stack = []
+    spans = word_spans.WordSpans(string, start, end)
 
     expand_stack.append("tex_word")
 
-    result = expand_to_tex_word(string, start, end)
+    result = spans.tex_word()
     if result:
         result["expand_stack"] = expand_stack
         return result
@@ -282,13 +277,13 @@ def expand(string, start, end):
     expand_stack.append("tex_math_command")
 
     # expand to math commands, e.g. \phi_x^2
-    regex = re.compile(r"[\w\\@^]", re.UNICODE)
-    result = expand_to_regex_set._expand_to_regex_rule(
-        string, start, end, regex, "tex_math_command")
+    result = spans.math_command()
     if result:
         result["expand_stack"] = expand_stack
         return result
 
+
+def expand_beyond_line(string, start, end):
     expand_stack = ["latex_command_arg"]
 
     result = expand_against_command_args(string, start, end)
@@ -320,7 +315,7 @@ def expand(string, start, end):
     env_result = expand_against_env(string, start, end)
 
     # there might be a {} inside the environment
-    sym_result = expand_to_symbols.expand_to_symbols(string, start, end)
+    sym_result = expand_to_symbols.expand_to_symbols(string, start, end, "latex")
     result = _closest_result(env_result, sym_result)
     if result == env_result:
         expand_stack.append("latex_environment")
@@ -0,0 +1,90 @@
+from array import array
+from bisect import bisect_right
+
+try:
+  # Block it from trying to import something which should not be on the python sys.path
+  # https://github.com/hktonylee/SublimeNumberKing/issues/4
+  import expand_region_handler
+  import document_cache
+  import patterns
+except:
+  from . import document_cache
+  from . import patterns
+
+# The offsets where the lines of a document start.
+#
+# A LineScanner finds the line of a position by searching the linebreaks
+# around it, which costs the length of the line. The LineIndex is built once
+# it pays off (see document_cache.get_when_paid_off) and finds the line of a
+# position with a binary search. Only "\n" is a linebreak, like in the buffers
+# of sublime.
+
+
+class LineIndex(object):
+  __slots__ = ("starts", "length")
+
+  def __init__(self, string):
+    starts = array("l", [0])
+    linebreak = patterns.get("line_start")
+    starts.extend(m.end() for m in linebreak.finditer(string))
+    self.starts = starts
+    self.length = len(string)
+
+  def line_start(self, index):
+    """Returns the start of the line containing the index."""
+    if index <= 0:
+      return index
+    return self.starts[bisect_right(self.starts, index) - 1]
+
+  def line_end(self, index):
+    """Returns the position of the linebreak ending the line, which contains
+    the index, or the end of the string."""
+    if index >= self.length:
+      return index
+    line = bisect_right(self.starts, index)
+    if line == len(self.starts):
+      return self.length
+    return self.starts[line] - 1
+
+  def get_line(self, start, end):
+    return {"start": self.line_start(start), "end": self.line_end(end)}
+
+
+class LineScanner(object):
+  """Finds the lines like a LineIndex, but searches the linebreaks."""
+  __slots__ = ("string", "length")
+
+  def __init__(self, string):
+    self.string = string
+    self.length = len(string)
+
+  def line_start(self, index):
+    """Returns the start of the line containing the index."""
+    if index <= 0:
+      return index
+    start = self.string.rfind("\n", 0, index) + 1
+    document_cache.add_scanned(self.string, "line_index", index - start)
+    return start
+
+  def line_end(self, index):
+    """Returns the position of the linebreak ending the line, which contains
+    the index, or the end of the string."""
+    if index >= self.length:
+      return index
+    end = self.string.find("\n", index)
+    if end == -1:
+      end = self.length
+    document_cache.add_scanned(self.string, "line_index", end - index)
+    return end
+
+  def get_line(self, start, end):
+    return {"start": self.line_start(start), "end": self.line_end(end)}
+
+
+def get(string):
+  """Returns the line index of the string, or a line scanner as long as the
+  index would not pay off."""
+  index = document_cache.get_when_paid_off(string, "line_index", LineIndex)
+  if index is None:
+    return LineScanner(string)
+  return index
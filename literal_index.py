@@ -0,0 +1,64 @@
+from bisect import bisect_right
+
+# The string literals and comments of a document.
+#
+# The expansions have to skip the brackets inside of strings and comments.
+# Without an index they find the strings with a regex over the whole
+# document. Inside of sublime the syntax has already found them, hence
+# ExpandRegion.py builds the index from the scopes of the view and attaches it
+# to the text of the view (see document_cache). A lookup is a binary search.
+
+
+class SpanIndex(object):
+  """Sorted, non-overlapping (start, end) spans."""
+  __slots__ = ("starts", "ends")
+
+  def __init__(self, spans):
+    self.starts = []
+    self.ends = []
+    for start, end in sorted(spans):
+      # join overlapping and adjacent spans
+      if self.ends and start <= self.ends[-1]:
+        self.ends[-1] = max(self.ends[-1], end)
+      else:
+        self.starts.append(start)
+        self.ends.append(end)
+
+  def find(self, pos):
+    """Returns the span containing the position or None."""
+    i = bisect_right(self.starts, pos) - 1
+    if i >= 0 and pos < self.ends[i]:
+      return self.starts[i], self.ends[i]
+    return None
+
+  def __len__(self):
+    return len(self.starts)
+
+
+class LiteralIndex(object):
+  __slots__ = ("strings", "comments", "_literals")
+
+  def __init__(self, strings, comments):
+    self.strings = SpanIndex(strings)
+    self.comments = SpanIndex(comments)
+    self._literals = SpanIndex(list(strings) + list(comments))
+
+  def find_literal(self, pos):
+    """Returns the string or comment containing the position or None."""
+    return self._literals.find(pos)
+
+  def get_mask(self, start, end):
+    """Returns a function, which returns the string or comment containing a
+    position or None. The literal containing the selection from start to end
+    is not masked, hence its content can be expanded."""
+    literals = self._literals
+    selected = literals.find(start)
+    if selected is not None and end > selected[1]:
+      selected = None
+
+    def is_masked(pos):
+      span = literals.find(pos)
+      if span == selected:
+        return None
+      return span
+    return is_masked
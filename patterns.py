@@ -0,0 +1,119 @@
+import re
+
+# The regular expressions of all expansions, compiled once.
+#
+# Get them with patterns.get(name) instead of compiling them where they are
+# used, the expansions run for every key press and every selection. A pattern
+# is compiled when it is used first, hence loading the plugin compiles none.
+
+_DEFINITIONS = {
+  # utils
+  "linebreak": ("(\n)", 0),
+  "trim": (r"^[ \t\n]*(.*?)[ \t\n]*$", re.DOTALL),
+  # line_index
+  "line_start": (r"\n", 0),
+  # expand_to_line
+  "spaces_and_tabs": (r"([ \t]+)", 0),
+  # expand_to_indent
+  "indent": (r"^(?P<spaces>\s*)", 0),
+  # word_spans
+  "subword_upper": (r"[A-Z]", 0),
+  "subword_lower": (r"[a-z]", 0),
+  "subword_neighbour": (r"[a-z0-9_]", re.IGNORECASE),
+  "two_upper": (r"[A-Z]{2}", 0),
+  "word": (r"[\w$]", re.UNICODE),
+  "word_with_dots": (r"[a-zA-Z0-9_$.]", 0),
+  "tex_word": (r"[a-zA-Z@]", re.UNICODE),
+  "tex_math_command": (r"[\w\\@^]", re.UNICODE),
+  "any_word": (r"[\w$.@\\^]", re.UNICODE),
+  # string_index, the quotes of the languages, see get_with_comments. Template
+  # literals and triple quoted strings may span lines, the others end on the
+  # line they start.
+  "string_literals": ("(['\"])(?:\\\\.|.)*?\\1", 0),
+  "string_literals_javascript": (r"`(?:\\[\s\S]|[^\\`])*`|(['\"])(?:\\.|.)*?\1", 0),
+  # triple quotes before single ones
+  "string_literals_python": (r"(\"\"\"|''')(?:\\[\s\S]|[^\\])*?\1|(['\"])(?:\\.|.)*?\2", 0),
+  # the comments of the languages, see get_with_comments. Block comments may
+  # span lines.
+  "comments_javascript": (r"//[^\n]*|/\*[\s\S]*?\*/", 0),
+  "comments_python": (r"#[^\n]*", 0),
+  "comments_html": (r"<!--[\s\S]*?-->", 0),
+  "comments_latex": (r"(?<!\\)%[^\n]*", 0),
+  # expand_to_symbols
+  "symbols_quotes": ("(['\"])(?:\\1|.*?\\1)", 0),
+  "symbols": (r"[\(\[\{\)\]\}]", 0),
+  "symbol_pair_parens": (r"[\(\)]", 0),
+  "symbol_pair_brackets": (r"[\[\]]", 0),
+  "symbol_pair_braces": (r"[\{\}]", 0),
+  # expand_to_semantic_unit
+  "semantic_unit_symbols": (r"([\(\[\{\)\]\}\,\;\=\&\|\n])", 0),
+  # expand_to_xml_node
+  "tag_opening": ("<", 0),
+  "tag_closing": (">", 0),
+  "tag_properties": (
+    r"<\s*"
+    r"(?P<closing>\/?)\s*"
+    r"(?P<name>[^\s\/]*)\s*"
+    r"(?:.*?)"
+    r"(?P<self_closing>\/?)\s*"
+    r">", 0),
+  # latex
+  "latex_begin_end": (
+    r"\\(?P<command>begin|end)"
+    r"(?:\[.*\])?"
+    r"\{(?P<name>[^\}]*)\}", 0),
+  "latex_exclusive_begin_end": (
+    r"^"
+    r"\\(?P<command>begin|end)"
+    r"(?:\[.*\])?"
+    r"\{(?P<name>[^\}]*)\}"
+    r"$", 0),
+  "latex_unescaped_dollar": (r"(?:[^\\]|^)\$", 0),
+}
+
+_compiled = {}
+
+# the patterns of find_tag, there is one per tag name
+_MAX_TAG_PATTERNS = 256
+_tag_patterns = {}
+
+
+def get(name):
+  regex = _compiled.get(name)
+  if regex is None:
+    pattern, flags = _DEFINITIONS[name]
+    regex = _compiled[name] = re.compile(pattern, flags)
+  return regex
+
+
+def get_with_comments(name, language):
+  """Returns the pattern, which also matches the comments of the language.
+  The comments are the last alternative, hence the groups of the pattern keep
+  their numbers. Languages without comments get the pattern itself. A variant
+  of the pattern for the language (e.g. string_literals_python) is preferred."""
+  if name + "_" + str(language) in _DEFINITIONS:
+    name = name + "_" + str(language)
+  comments_name = "comments_" + str(language)
+  if comments_name not in _DEFINITIONS:
+    return get(name)
+  key = name + "+" + comments_name
+  regex = _compiled.get(key)
+  if regex is None:
+    pattern, flags = _DEFINITIONS[name]
+    comments = _DEFINITIONS[comments_name][0]
+    regex = _compiled[key] = re.compile(
+      "(?:" + pattern + ")|(?:" + comments + ")", flags)
+  return regex
+
+
+def get_tag(tag_name):
+  """Returns the pattern matching the opening and closing tags with the name,
+  all tags if the name is empty."""
+  regex = _tag_patterns.get(tag_name)
+  if regex is None:
+    if len(_tag_patterns) >= _MAX_TAG_PATTERNS:
+      _tag_patterns.clear()
+    name = re.escape(tag_name)
+    regex = re.compile("<\\s*" + name + ".*?>|<\\/\\s*" + name + "\\s*>")
+    _tag_patterns[tag_name] = regex
+  return regex
@@ -0,0 +1,57 @@
+# A snapshot of the ExpandRegion settings.
+#
+# ExpandRegion.py loads it once and updates it whenever the settings change,
+# hence expanding a selection does not have to load any settings. Read the
+# values via plugin_settings.current, it is replaced as a whole on updates.
+# This module does not depend on sublime, the tests use the defaults.
+
+
+class Settings(object):
+  """The typed values of ExpandRegion.sublime-settings and
+  ExpandRegionFallback.sublime-settings."""
+  __slots__ = (
+    "force_soft_undo_integration",
+    "selection_history_max_depth",
+    "persist_selection_history",
+    "scope_selectors",
+    "fallback_scope_selectors",
+    "trace_enabled",
+    "trace_size",
+    "prefetch_expansions",
+    "async_expansion",
+    "expansion_time_budget_ms",
+    "native_search",
+    "scope_literals",
+    "long_line_threshold",
+  )
+
+  def __init__(self, settings=None, fallback_settings=None):
+    # both, sublime.Settings and dicts, can be used
+    settings = settings or {}
+    fallback_settings = fallback_settings or {}
+    self.force_soft_undo_integration = bool(
+      settings.get("force_soft_undo_integration", True))
+    self.selection_history_max_depth = int(
+      settings.get("selection_history_max_depth", 100))
+    self.persist_selection_history = bool(
+      settings.get("persist_selection_history", False))
+    self.scope_selectors = dict(settings.get("scope_selectors") or {})
+    self.fallback_scope_selectors = dict(
+      fallback_settings.get("scope_selectors") or {})
+    self.trace_enabled = bool(settings.get("trace_enabled", False))
+    self.trace_size = int(settings.get("trace_size", 1000))
+    self.prefetch_expansions = bool(settings.get("prefetch_expansions", True))
+    self.async_expansion = bool(settings.get("async_expansion", False))
+    self.expansion_time_budget_ms = int(
+      settings.get("expansion_time_budget_ms", 200))
+    self.native_search = bool(settings.get("native_search", True))
+    self.scope_literals = bool(settings.get("scope_literals", True))
+    self.long_line_threshold = int(settings.get("long_line_threshold", 10000))
+
+
+current = Settings()
+
+
+def update(settings, fallback_settings):
+  global current
+  current = Settings(settings, fallback_settings)
@@ -1,16 +1,29 @@
 try:
     import expand_to_indent
     import javascript
+    import line_index
     import utils
 except:
     from . import expand_to_indent
     from . import javascript
+    from . import line_index
     from . import utils
 
 
 def expand(string, start, end):
+    result = expand_within_line(string, start, end)
+    if result:
+        return result
+    return expand_beyond_line(string, start, end)
+
+
+def expand_within_line(string, start, end):
+    return javascript.expand_within_line(string, start, end, "python")
+
+
+def expand_beyond_line(string, start, end):
     expand_stack = []
-    result = javascript.expand(string, start, end)
+    result = javascript.expand_beyond_line(string, start, end, "python")
     if result:
         return result
 
@@ -41,8 +54,9 @@ def expand(string, start, end):
 def expand_over_line_continuation(string, start, end):
     if not string[end-1:end] == "\\":
         return None
-    line = utils.get_line(string, start, start)
-    next_line = utils.get_line(string, end + 1, end + 1)
+    lines = line_index.get(string)
+    line = lines.get_line(start, start)
+    next_line = lines.get_line(end + 1, end + 1)
     start = line["start"]
     end = next_line["end"]
     next_result = expand_over_line_continuation(string, start, end)
@@ -59,15 +73,14 @@ def expand_python_block_from_start(string, start, end):
     result = expand_to_indent.expand_to_indent(string, end + 1,
                                                end + 1)
     if result:
-        # line = utils.get_line(string, start, start)
-        line = utils.get_line(string, start, start)
+        line = line_index.get(string).get_line(start, start)
         start = line["start"]
         end = result["end"]
         return utils.create_return_obj(start, end, string, "py_block_start")
 
 
 def expand_line_without_indent(string, start, end):
-    line = utils.get_line(string, start, end)
+    line = line_index.get(string).get_line(start, end)
     indent = expand_to_indent.get_indent(string, line)
     lstart = min(start, line["start"] + indent)
     lend = max(end, line["end"])
@@ -0,0 +1,75 @@
+import re
+import sys
+
+try:
+  # Block it from trying to import something which should not be on the python sys.path
+  # https://github.com/hktonylee/SublimeNumberKing/issues/4
+  import expand_region_handler
+  import document_cache
+except:
+  from . import document_cache
+
+# Searching a document for the matches of a pattern.
+#
+# By default the document string is searched with python regexes. Inside of
+# sublime the string is a copy of a view, which can search its buffer natively
+# (view.find_all). ExpandRegion.py attaches such a backend to the copy, which
+# is used as long as it can answer the search. A backend has a single method
+# find_all(regex), which returns the (start, end) spans of all matches in the
+# whole document or None.
+
+# The native search uses another regex dialect (oniguruma), hence only the
+# patterns without the constructs the dialects disagree on are searched
+# natively: lookbehinds, word and string boundaries, named backreferences and
+# the anchors ^ and $, which match at every line in oniguruma. The flags are
+# checked by the backend.
+_NON_PORTABLE = re.compile(r"\(\?<[=!]|\(\?P=|\\[bBAZz]|(?<![\\\[])\^|(?<!\\)\$")
+
+# python 2.6 can't limit finditer to a part of the string
+_HAS_BOUNDED_FINDITER = sys.version_info >= (2, 7)
+
+
+def attach(string, backend):
+  """Searches the string with the backend. Only used for long strings, short
+  ones are searched with python."""
+  document_cache.put(string, "search", backend)
+
+
+def finditer(string, regex, pos=0, endpos=None):
+  """Returns an iterator over the (start, end) spans of the matches between pos
+  and endpos, like regex.finditer(string, pos, endpos)."""
+  if endpos is None:
+    endpos = len(string)
+  backend = document_cache.peek(string, "search")
+  if backend is not None and is_portable(regex):
+    spans = backend.find_all(regex)
+    if spans is not None:
+      return _spans_between(spans, pos, endpos)
+  return _finditer(string, regex, pos, endpos)
+
+
+def is_portable(regex):
+  """Tells if the native search finds the same matches as python."""
+  return _NON_PORTABLE.search(regex.pattern) is None
+
+
+def _spans_between(spans, pos, endpos):
+  for start, end in spans:
+    if end > endpos:
+      break
+    if start >= pos:
+      yield start, end
+
+
+def _finditer(string, regex, pos, endpos):
+  if pos == 0 and endpos == len(string):
+    matches = regex.finditer(string)
+    offset = 0
+  elif _HAS_BOUNDED_FINDITER:
+    matches = regex.finditer(string, pos, endpos)
+    offset = 0
+  else:
+    matches = regex.finditer(string[pos:endpos])
+    offset = pos
+  for m in matches:
+    yield offset + m.start(), offset + m.end()
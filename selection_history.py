@@ -0,0 +1,88 @@
+from collections import deque
+
+# The history of the expanded selections, which is used to shrink them again.
+#
+# It lives in the plugin host only and stores plain (start, end) pairs, hence
+# neither expanding nor shrinking has to serialize anything. Each key (usually
+# the id of a view) has one bounded stack per selected region, which is only
+# valid for the version of the buffer identified by its token.
+
+
+class _Entry(object):
+  __slots__ = ("token", "stacks")
+
+  def __init__(self, token, stacks):
+    self.token = token
+    self.stacks = stacks
+
+
+def _is_top(entry, regions):
+  if len(entry.stacks) != len(regions):
+    return False
+  for stack, region in zip(entry.stacks, regions):
+    if not stack or stack[-1] != region:
+      return False
+  return True
+
+
+class SelectionHistory(object):
+
+  def __init__(self, max_depth=100):
+    self.max_depth = max_depth
+    self._entries = {}
+
+  def push(self, key, token, old_regions, new_regions):
+    """Adds the regions the old_regions were expanded to. The stacks are
+    restarted, if the buffer changed or the old_regions are not the last
+    expansion."""
+    entry = self._entries.get(key)
+    if (entry is None or entry.token != token or
+        len(old_regions) != len(new_regions) or not _is_top(entry, old_regions)):
+      stacks = [deque([region], self.max_depth) for region in new_regions]
+      self._entries[key] = _Entry(token, stacks)
+      return
+    for stack, region in zip(entry.stacks, new_regions):
+      stack.append(region)
+
+  def pop(self, key, token, regions):
+    """Returns the regions, which were selected before the regions were
+    expanded or None, if there are none."""
+    entry = self._entries.get(key)
+    if entry is None:
+      return None
+    if entry.token != token or not _is_top(entry, regions):
+      del self._entries[key]
+      return None
+    previous_regions = []
+    for stack in entry.stacks:
+      stack.pop()
+      if not stack:
+        del self._entries[key]
+        return None
+      previous_regions.append(stack[-1])
+    return previous_regions
+
+  def discard(self, key):
+    self._entries.pop(key, None)
+
+  def __contains__(self, key):
+    return key in self._entries
+
+  def __len__(self):
+    return len(self._entries)
+
+  def dump(self, key):
+    """Returns the history of the key as json compatible object."""
+    entry = self._entries.get(key)
+    if entry is None:
+      return None
+    stacks = [[list(region) for region in stack] for stack in entry.stacks]
+    return {"hash": entry.token, "stacks": stacks}
+
+  def load(self, key, data):
+    """Restores the history of the key from the result of dump."""
+    if not data or "stacks" not in data:
+      return
+    stacks = [deque((tuple(region) for region in stack), self.max_depth)
+              for stack in data["stacks"]]
+    self._entries[key] = _Entry(data.get("hash"), stacks)
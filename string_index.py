@@ -0,0 +1,155 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+try:
+  # Block it from trying to import something which should not be on the python sys.path
+  # https://github.com/hktonylee/SublimeNumberKing/issues/4
+  import expand_region_handler
+  import document_cache
+  import literal_index
+  import patterns
+  import search
+except:
+  from . import document_cache
+  from . import literal_index
+  from . import patterns
+  from . import search
+
+# The string literals and comments of a document.
+#
+# A literal is quoted with ' or " and ends on the line it starts. Some
+# languages have more quotes (see patterns.py), e.g. the triple quotes of
+# python and the template literals of javascript, which may span lines like
+# block comments.
+#
+# The strings and the comments of the language (see patterns.py) are found in
+# one pass, hence quotes inside of comments and comment markers inside of
+# strings are skipped. The index is built once per document and language and
+# finds the literals around a selection with a binary search.
+#
+# A part of the document (e.g. a line window, see text_window) can't be
+# searched on its own, it might start inside of a docstring. Its literals are
+# taken from the index of the document instead (see attach_part). If one of
+# them crosses the border of the part, LiteralOutside is raised and the
+# caller expands against the whole document.
+
+_QUOTES = "'\"`"
+
+
+class LiteralOutside(Exception):
+  """A literal crosses the border of a part of the document."""
+
+
+class StringIndex(object):
+  __slots__ = ("starts", "ends", "comments")
+
+  def __init__(self, string, language=None):
+    self.starts = array("l")
+    self.ends = array("l")
+    comments = []
+    regex = patterns.get_with_comments("string_literals", language)
+    for start, end in search.finditer(string, regex):
+      if string[start] in _QUOTES:
+        self.starts.append(start)
+        self.ends.append(end)
+      else:
+        comments.append((start, end))
+    self.comments = literal_index.SpanIndex(comments)
+
+  def find_literal(self, pos):
+    """Returns the span of the literal or comment containing the position or
+    None, like LiteralIndex.find_literal."""
+    i = bisect_right(self.starts, pos) - 1
+    if i >= 0 and pos < self.ends[i]:
+      return self.starts[i], self.ends[i]
+    return self.comments.find(pos)
+
+  def find_overlapping(self, start, end):
+    """Returns the (start, end) spans of the literals, which end at or behind
+    start and start at or before end, in the order of the document."""
+    i = bisect_left(self.ends, start)
+    spans = []
+    while i < len(self.starts) and self.starts[i] <= end:
+      spans.append((self.starts[i], self.ends[i]))
+      i += 1
+    return spans
+
+  def get_part(self, begin, end, inner_begin, inner_end):
+    """Returns the index of the part of the document from begin to end, the
+    positions are relative to begin. Raises LiteralOutside if a literal
+    crosses the border of the part and overlaps inner_begin to inner_end,
+    the other crossing ones are left out (e.g. in the padding of a window)."""
+    part = StringIndex("")
+    for span_start, span_end in _cut(self.starts, self.ends, begin, end,
+                                     inner_begin, inner_end):
+      part.starts.append(span_start)
+      part.ends.append(span_end)
+    part.comments = literal_index.SpanIndex(_cut(
+      self.comments.starts, self.comments.ends, begin, end, inner_begin, inner_end))
+    return part
+
+  def __len__(self):
+    return len(self.starts)
+
+
+def _cut(starts, ends, begin, end, inner_begin, inner_end):
+  # the sorted spans between begin and end, relative to begin
+  spans = []
+  i = bisect_right(ends, begin)
+  while i < len(starts) and starts[i] < end:
+    if starts[i] < begin or ends[i] > end:
+      if starts[i] < inner_end and ends[i] > inner_begin:
+        raise LiteralOutside()
+    else:
+      spans.append((starts[i] - begin, ends[i] - begin))
+    i += 1
+  return spans
+
+
+# the parts of the documents, which are expanded by the current thread, as
+# (part, begin, get_index, inner_begin, inner_end, indexes) lists, the most
+# recent last
+_MAX_PARTS = 8
+_parts = threading.local()
+
+
+def attach_part(part, begin, get_index, inner_begin=None, inner_end=None):
+  """The part string is the text of a document from begin on. get_index(
+  language) returns the index of the document, get(part) returns the part of
+  it. The literals crossing the border of the part are only an error, if
+  they overlap inner_begin to inner_end (the whole part by default)."""
+  end = begin + len(part)
+  if inner_begin is None:
+    inner_begin = begin
+  if inner_end is None:
+    inner_end = end
+  parts = getattr(_parts, "list", None)
+  if parts is None:
+    parts = _parts.list = []
+  parts.append((part, begin, get_index, inner_begin, inner_end, {}))
+  if len(parts) > _MAX_PARTS:
+    del parts[0]
+
+
+def _get_attached(string, language):
+  for part, begin, get_index, inner_begin, inner_end, indexes in reversed(
+      getattr(_parts, "list", ())):
+    if part is string:
+      index = indexes.get(language)
+      if index is None:
+        index = indexes[language] = get_index(language).get_part(
+          begin, begin + len(part), inner_begin, inner_end)
+      return index
+  return None
+
+
+def get(string, language=None):
+  """Returns the string index of the string, the comments are only known if
+  the language is given. Raises LiteralOutside for an attached part of a
+  document, which cuts a literal (see attach_part)."""
+  index = _get_attached(string, language)
+  if index is not None:
+    return index
+  return document_cache.get(string, ("string_index", language),
+                            lambda string: StringIndex(string, language))
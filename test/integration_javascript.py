@@ -129,5 +129,23 @@ class JavascriptIntegrationTest(unittest.TestCase):
     self.assertEqual(result["type"], "quotes")
     self.assertEqual(result["expand_stack"], ["subword", "word", "quotes"])
 
+  def test_expand_many (self):
+    results = expand_many(self.string1, [(7, 7), (6, 9), (2, 9)]);
+    self.assertEqual(len(results), 3)
+    self.assertEqual(results[0]["type"], "subword")
+    self.assertEqual(results[1]["type"], "word")
+    self.assertEqual(results[2]["start"], 2)
+    self.assertEqual(results[2]["end"], 17)
+    self.assertEqual(results[2]["type"], "quotes")
+
+  def test_expand_many_shares_document (self):
+    # long enough to be held in the document cache
+    string = "foo(\"a(\",\n  bar)" + " " * 4096
+    results = expand_many(string, [(13, 13), (9, 15)]);
+    self.assertEqual(results[0]["string"], "bar")
+    self.assertEqual(results[1]["start"], 4)
+    self.assertEqual(results[1]["end"], 15)
+    self.assertEqual(results[1]["type"], "symbol")
+
 if __name__ == "__main__":
   unittest.main()
\ No newline at end of file
@@ -0,0 +1,56 @@
+# Reports how long loading the plugin modules takes.
+#
+# Every measurement runs in a new interpreter, hence nothing is imported yet.
+# Run it from the root of the package: python -m test.startup_benchmark
+
+import subprocess
+import sys
+
+_REPEAT = 5
+
+_MODULES = [
+  "expand_region_handler",
+  "javascript",
+  "python",
+  "html",
+  "latex",
+]
+
+_IMPORT_SCRIPT = """
+import time
+clock = getattr(time, "perf_counter", time.time)
+start_time = clock()
+import {0}
+print((clock() - start_time) * 1000)
+"""
+
+_FIRST_EXPANSION_SCRIPT = """
+import time
+clock = getattr(time, "perf_counter", time.time)
+import expand_region_handler
+start_time = clock()
+expand_region_handler.expand("foo.barBaz(1, 2)", 5, 5, "{0}")
+print((clock() - start_time) * 1000)
+"""
+
+
+def _measure(script):
+  times = []
+  for i in range(_REPEAT):
+    output = subprocess.check_output([sys.executable, "-c", script])
+    times.append(float(output.decode("utf-8").strip()))
+  return min(times)
+
+
+def main():
+  print("import (best of {0}, ms):".format(_REPEAT))
+  for module in _MODULES:
+    print("  {0:24}{1:8.2f}".format(module, _measure(_IMPORT_SCRIPT.format(module))))
+  print("first expansion, including loading the language (ms):")
+  for language in ["", "python", "html", "latex"]:
+    script = _FIRST_EXPANSION_SCRIPT.format(language)
+    print("  {0:24}{1:8.2f}".format(language or "javascript", _measure(script)))
+
+
+if __name__ == "__main__":
+  main()
@@ -1,13 +1,26 @@
 import unittest
 
 from . import units_utils
+from . import units_line_index
+from . import units_document_cache
 from . import units_expand_to_word
 from . import units_expand_to_word_with_dots
+from . import units_word_spans
 from . import units_expand_to_line
 from . import units_expand_to_quotes
 from . import units_expand_to_semantic_unit
 from . import units_expand_to_symbol
 from . import units_xml_helper
+from . import undo_redo
+from . import units_selection_history
+from . import units_plugin_settings
+from . import units_tracing
+from . import units_expansion_ladder
+from . import units_text_window
+from . import units_languages
+from . import units_search
+from . import units_literal_index
+from . import units_bracket_index
 from . import integration_javascript
 from . import integration_html
 from . import integration_latex
@@ -20,14 +33,28 @@ if __name__ == "__main__":
   suite.addTests(test_loader.loadTestsFromTestCase(units_utils.UtilsTest))
   suite.addTests(test_loader.loadTestsFromTestCase(units_utils.GetLineTest))
   suite.addTests(test_loader.loadTestsFromTestCase(units_utils.TrimTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_utils.ExpansionResultTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_line_index.LineIndexTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_document_cache.DocumentCacheTest))
 
   suite.addTests(test_loader.loadTestsFromTestCase(units_expand_to_word.WordTest))
   suite.addTests(test_loader.loadTestsFromTestCase(units_expand_to_word_with_dots.WordWithDotsTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_word_spans.WordSpansTest))
   suite.addTests(test_loader.loadTestsFromTestCase(units_expand_to_line.ExpandToLineTest))
   suite.addTests(test_loader.loadTestsFromTestCase(units_expand_to_quotes.ExpandToQuotesTest))
   suite.addTests(test_loader.loadTestsFromTestCase(units_expand_to_semantic_unit.ExpandToSemanticUnitTest))
   suite.addTests(test_loader.loadTestsFromTestCase(units_expand_to_symbol.ExpandToSymbolTest))
   suite.addTests(test_loader.loadTestsFromTestCase(units_xml_helper.XmlHelperTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(undo_redo.UndoRedoTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_selection_history.SelectionHistoryTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_plugin_settings.PluginSettingsTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_tracing.TracingTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_expansion_ladder.ExpansionLadderTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_text_window.TextWindowTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_languages.LanguagesTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_search.SearchTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_literal_index.LiteralIndexTest))
+  suite.addTests(test_loader.loadTestsFromTestCase(units_bracket_index.BracketIndexTest))
 
   suite.addTests(test_loader.loadTestsFromTestCase(integration_javascript.JavascriptIntegrationTest))
   suite.addTests(test_loader.loadTestsFromTestCase(integration_html.HtmlIntegrationTest))
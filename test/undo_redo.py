@@ -63,6 +63,20 @@ class UndoRedoTest(unittest.TestCase):
     self.assertEqual(newSettings.get("stack")[0].get("start"), 1)
     self.assertEqual(newSettings.get("stack")[0].get("end"), 4)
 
+  def test_use_token_instead_of_hash (self):
+    settingsJson = '{"hash": "1:5", "stack": [{"start": 2, "end": 3}]}'
+    newSettingsJson = add_to_stack(settingsJson, None, 1, 4, 2, 3, "1:5");
+    newSettings = json.loads(newSettingsJson)
+    self.assertEqual(newSettings.get("hash"), "1:5")
+    self.assertEqual(len(newSettings.get("stack")), 2)
+
+  def test_reset_stack_if_token_changed (self):
+    settingsJson = '{"hash": "1:5", "stack": [{"start": 2, "end": 3}]}'
+    newSettingsJson = add_to_stack(settingsJson, None, 1, 4, 2, 3, "1:6");
+    newSettings = json.loads(newSettingsJson)
+    self.assertEqual(newSettings.get("hash"), "1:6")
+    self.assertEqual(len(newSettings.get("stack")), 1)
+
   ## undo
 
   def test_clear_stack_on_undo_because_string_is_different (self):
@@ -109,6 +123,13 @@ class UndoRedoTest(unittest.TestCase):
     self.assertEqual(newSettings.get("hash"), "d67c5cbf5b01c9f91932e3b8def5e5f8")
     self.assertEqual(len(newSettings.get("stack")), 0)
 
+  def test_return_last_selection_with_token (self):
+    settingsJson = '{"hash": "1:5", "stack": [{"start": 2, "end": 3}, {"start": 1, "end": 4}]}'
+    result = get_last_selection(settingsJson, None, 1, 4, "1:5");
+    newSelection = result["newSelection"]
+    self.assertEqual(newSelection.get("startIndex"), 2)
+    self.assertEqual(newSelection.get("endIndex"), 3)
+
   def test_should_not_crash_when_last_selection (self):
     settingsJson = '{"hash": "d67c5cbf5b01c9f91932e3b8def5e5f8", "stack": [{"start": 1, "end": 4}]}'
     result = get_last_selection(settingsJson, "teststring", 1, 4);
@@ -0,0 +1,79 @@
+import unittest
+
+from bracket_index import *
+import patterns
+import document_cache
+from expand_to_symbols import expand_to_symbols
+
+def _index(string, is_masked=None):
+  return BracketIndex(find_tokens(string, patterns.get("symbols"), is_masked))
+
+class BracketIndexTest(unittest.TestCase):
+
+  def tearDown(self):
+    document_cache.clear()
+
+  def test_enclosing_pair (self):
+    index = _index("a(b[c]d{e}f)g")
+    self.assertTrue(index.is_valid)
+    self.assertEqual(index.enclosing_pair(0), None)
+    self.assertEqual(index.enclosing_pair(2), (1, 11))
+    self.assertEqual(index.enclosing_pair(4), (3, 5))
+    self.assertEqual(index.enclosing_pair(5), (3, 5))
+    self.assertEqual(index.enclosing_pair(6), (1, 11))
+    self.assertEqual(index.enclosing_pair(12), None)
+
+  def test_depth (self):
+    index = _index("((a)(b))")
+    self.assertEqual([index.depth(pos) for pos in range(9)], [0, 1, 2, 2, 1, 2, 2, 1, 0])
+
+  def test_symbols_by_level (self):
+    tokens = find_tokens("a, (b, c), d", patterns.get("semantic_unit_symbols"))
+    index = BracketIndex(tokens)
+    self.assertEqual(index.last_symbol(0, 0, 11), 9)
+    self.assertEqual(index.last_symbol(1, 0, 11), 5)
+    self.assertEqual(index.first_symbol(0, 2, 12), 9)
+    self.assertEqual(index.first_symbol(1, 6, 8), None)
+    self.assertEqual(index.first_symbol(2, 0, 12), None)
+
+  def test_unbalanced (self):
+    self.assertFalse(_index("(a]").is_valid)
+    self.assertFalse(_index("((a)").is_valid)
+    self.assertFalse(_index("a)").is_valid)
+
+  def test_skip_masked (self):
+    index = _index("(a, \")\")", lambda pos: 4 <= pos < 7)
+    self.assertTrue(index.is_valid)
+    self.assertEqual(index.enclosing_pair(2), (0, 7))
+
+  def test_expand_in_large_document (self):
+    string = "[" + ", ".join(["{\"a\": [1, 2]}"] * 1000) + "]"
+    result = expand_to_symbols(string, 1 + 15 * 400 + 4, 1 + 15 * 400 + 4)
+    self.assertEqual(document_cache.peek(string, ("bracket_index", None)), None)
+    self.assertEqual(result["string"], "\"a\": [1, 2]")
+    result = expand_to_symbols(string, 1, len(string) - 1)
+    self.assertEqual((result["start"], result["end"]), (0, len(string)))
+    # the scans examined the whole document, the index pays off
+    result = expand_to_symbols(string, 1 + 15 * 400 + 4, 1 + 15 * 400 + 4)
+    self.assertTrue(document_cache.peek(string, ("bracket_index", None)).is_valid)
+    self.assertEqual(result["string"], "\"a\": [1, 2]")
+
+  def test_reuse_index_of_same_version (self):
+    string = "[" + ", ".join(["{\"a\": [1, 2]}"] * 1000) + "]"
+    document_cache.bind(string, "1:1")
+    expand_to_symbols(string, 1, len(string) - 1)
+    expand_to_symbols(string, 5, 5)
+    index = document_cache.peek(string, ("bracket_index", None))
+    copy = "".join(list(string))
+    document_cache.bind(copy, "1:1")
+    self.assertTrue(document_cache.peek(copy, ("bracket_index", None)) is index)
+    result = expand_to_symbols(copy, 1 + 15 * 400 + 4, 1 + 15 * 400 + 4)
+    self.assertEqual(result["string"], "\"a\": [1, 2]")
+
+  def test_unbalanced_selection (self):
+    string = "f(a) + g(b)" + " " * 3000
+    result = expand_to_symbols(string, 3, 9)
+    self.assertEqual(result["string"], "a) + g(b")
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,67 @@
+import threading
+import unittest
+
+import document_cache
+
+class DocumentCacheTest(unittest.TestCase):
+
+  def tearDown(self):
+    document_cache.clear()
+
+  def test_cache_by_identity (self):
+    string = "a" * 3000
+    copy = "".join(list(string))
+    self.assertEqual(document_cache.get(string, "key", len), 3000)
+    self.assertEqual(document_cache.peek(string, "key"), 3000)
+    self.assertEqual(document_cache.peek(copy, "key"), None)
+
+  def test_take_over_data_of_same_version (self):
+    string = "a" * 3000
+    copy = "".join(list(string))
+    document_cache.bind(string, "1:1")
+    document_cache.put(string, "key", 1)
+    document_cache.bind(copy, "1:1")
+    self.assertEqual(document_cache.peek(copy, "key"), 1)
+    # the old copy is released
+    self.assertEqual(document_cache.peek(string, "key"), None)
+    other = "".join(list(string))
+    document_cache.bind(other, "1:2")
+    self.assertEqual(document_cache.peek(other, "key"), None)
+
+  def test_short_strings_are_not_cached (self):
+    document_cache.put("abc", "key", 1)
+    self.assertEqual(document_cache.peek("abc", "key"), None)
+
+  def test_build_once_it_pays_off (self):
+    string = "a" * 3000
+    self.assertEqual(document_cache.get_when_paid_off(string, "key", len), None)
+    document_cache.add_scanned(string, "key", 2000)
+    self.assertEqual(document_cache.get_when_paid_off(string, "key", len), None)
+    document_cache.add_scanned(string, "key", 1000)
+    self.assertEqual(document_cache.get_when_paid_off(string, "key", len), 3000)
+    self.assertEqual(document_cache.peek(string, "key"), 3000)
+    # short strings are always scanned
+    document_cache.add_scanned("abc", "key", 3)
+    self.assertEqual(document_cache.get_when_paid_off("abc", "key", len), None)
+
+  def test_concurrent_access (self):
+    strings = [str(i) * 3000 for i in range(8)]
+    errors = []
+    def work():
+      try:
+        for i in range(2000):
+          string = strings[i % len(strings)]
+          document_cache.get(string, "key", len)
+          document_cache.put(string, "other", i)
+          document_cache.peek(string, "key")
+      except Exception as e:
+        errors.append(e)
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEqual(errors, [])
+
+if __name__ == "__main__":
+  unittest.main()
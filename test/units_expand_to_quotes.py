@@ -51,5 +51,67 @@ class ExpandToQuotesTest(unittest.TestCase):
     self.assertEqual(result["end"], 13)
     self.assertEqual(result["string"], "test\\\"string")
 
+  def test_template_literal (self):
+    result = expand_to_quotes("a = `x ${b}`;", 8, 8, "javascript");
+    self.assertEqual(result["string"], "x ${b}")
+    result = expand_to_quotes("a = `x ${b}`;", 5, 11, "javascript");
+    self.assertEqual(result["string"], "`x ${b}`")
+    result = expand_to_quotes("a = `x ${b}`;", 8, 8);
+    self.assertEqual(result, None)
+
+  def test_triple_quotes (self):
+    result = expand_to_quotes("x = \"\"\"it's\"\"\"", 8, 8, "python");
+    self.assertEqual(result["string"], "it's")
+    result = expand_to_quotes("x = \"\"\"it's\"\"\"", 7, 11, "python");
+    self.assertEqual(result["string"], "\"\"\"it's\"\"\"")
+
+  def test_multi_line_literals (self):
+    string = "def f():\n    \"\"\"Return it.\n    \"\"\"\n"
+    result = expand_to_quotes(string, 20, 20, "python");
+    self.assertEqual(result["string"], "Return it.\n    ")
+    string = "x = `line one\nline two`;"
+    result = expand_to_quotes(string, 8, 8, "javascript");
+    self.assertEqual(result["string"], "line one\nline two")
+    # the other quotes end on their line
+    self.assertEqual(expand_to_quotes("x = 'a\nb'", 6, 6, "javascript"), None)
+
+  def test_literals_of_a_part (self):
+    string = "a = 'b';\nx = `c\nd`;\n"
+    part = string[9:15]
+    string_index.attach_part(part, 9, lambda language: string_index.get(string, language))
+    # the template literal crosses the end of the part
+    self.assertRaises(string_index.LiteralOutside, string_index.get, part, "javascript")
+    part = string[0:11]
+    string_index.attach_part(part, 0, lambda language: string_index.get(string, language), 0, 8)
+    # it only crosses the padding
+    result = expand_to_quotes(part, 5, 5, "javascript");
+    self.assertEqual(result["string"], "b")
+    self.assertEqual(len(string_index.get(part, "javascript")), 1)
+
+  def test_latex_quotes (self):
+    # ` is an opening quote in latex, not a string
+    result = expand_to_quotes("x `a` y", 3, 3, "latex");
+    self.assertEqual(result, None)
+    result = expand_to_quotes("x `a` y", 3, 3, "javascript");
+    self.assertEqual(result["string"], "a")
+
+  def test_string_near_end_of_large_document (self):
+    string = "f('a', \"b\");\n" * 1000
+    result = expand_to_quotes(string, len(string) - 4, len(string) - 4);
+    self.assertEqual((result["start"], result["end"]), (len(string) - 5, len(string) - 4))
+    self.assertEqual(len(string_index.get(string)), 2000)
+
+  def test_skip_quotes_in_comments (self):
+    string = "a = 'b'; // it's \"c\"\nd = '//e'"
+    self.assertEqual(expand_to_quotes(string, 18, 18, "javascript"), None)
+    result = expand_to_quotes(string, 27, 27, "javascript");
+    self.assertEqual(result["string"], "//e")
+    index = string_index.get(string, "javascript")
+    self.assertEqual(list(zip(index.comments.starts, index.comments.ends)), [(9, 20)])
+
+  def test_python_comments (self):
+    result = expand_to_quotes("# don't\nx = 'a'", 14, 14, "python");
+    self.assertEqual(result["string"], "a")
+
 if __name__ == "__main__":
   unittest.main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import unittest
 
+import document_cache
 from expand_to_semantic_unit import *
 
 class ExpandToSemanticUnitTest(unittest.TestCase):
@@ -97,5 +98,66 @@ class ExpandToSemanticUnitTest(unittest.TestCase):
     result = expand_to_semantic_unit("aa || bb", 3, 3);
     self.assertEqual(result, None)
 
+  def test_unbalanced_document (self):
+    result = expand_to_semantic_unit("f(a, b + c]; g", 8, 8);
+    self.assertEqual(result["string"], "b + c")
+
+  def test_large_balanced_document (self):
+    string = "x = [" + ", ".join(["f(a, b)"] * 1000) + "];\n"
+    result = expand_to_semantic_unit(string, 3000, 3000);
+    self.assertEqual(result["string"], "f(a, b)")
+    result = expand_to_semantic_unit(string, 5 + 9 * 300 + 2, 5 + 9 * 300 + 2);
+    self.assertEqual((result["start"], result["end"]), (5 + 9 * 300 + 2, 5 + 9 * 300 + 3))
+
+  def test_find_tokens_once_they_pay_off (self):
+    string = "x = f(a, b);\n" * 1000
+    result = expand_to_semantic_unit(string, 6, 6, "python");
+    self.assertEqual(result["string"], "a")
+    # only the line of the selection is scanned
+    self.assertEqual(document_cache.peek(string, ("semantic_unit_tokens", "python")), None)
+    self.assertEqual(document_cache.peek(string, ("scanned", ("semantic_unit_tokens", "python"))), 13)
+    for line in range(1, 1000):
+      result = expand_to_semantic_unit(string, 13 * line + 6, 13 * line + 6, "python");
+      self.assertEqual(result["start"], 13 * line + 6)
+    # the scans examined the whole document, the tokens pay off
+    result = expand_to_semantic_unit(string, 6, 6, "python");
+    self.assertEqual(result["string"], "a")
+    self.assertTrue(document_cache.peek(string, ("semantic_unit_tokens", "python")).brackets.is_valid)
+
+  def test_skip_symbols_in_comments (self):
+    string = "foo(a, b) # c (\nd"
+    result = expand_to_semantic_unit(string, 0, 3, "python");
+    self.assertEqual(result["string"], "foo(a, b)")
+    result = expand_to_semantic_unit(string, 0, 3);
+    self.assertEqual(result, None)
+
+  def test_comments_bound_units (self):
+    string = "a = /* b */ c + d; // e, f"
+    result = expand_to_semantic_unit(string, 12, 13, "javascript");
+    self.assertEqual(result["string"], "c + d")
+    # inside of a comment
+    result = expand_to_semantic_unit(string, 24, 24, "javascript");
+    self.assertEqual(result, None)
+    # the same with the tokens of the whole document
+    string = string + " " * 3000
+    for i in range(2):
+      expand_to_semantic_unit(string, 12, 13, "javascript");
+    result = expand_to_semantic_unit(string, 12, 13, "javascript");
+    self.assertTrue(document_cache.peek(string, ("semantic_unit_tokens", "javascript")))
+    self.assertEqual(result["string"], "c + d")
+    result = expand_to_semantic_unit(string, 24, 24, "javascript");
+    self.assertEqual(result, None)
+
+  def test_multi_line_comments (self):
+    string = "f(a, /* b,\n c */ d + e)"
+    result = expand_to_semantic_unit(string, 21, 21, "javascript");
+    self.assertEqual(result["string"], "d + e")
+    # the same with the tokens of the whole document
+    string = string + " " * 3000
+    for i in range(3):
+      result = expand_to_semantic_unit(string, 21, 21, "javascript");
+    self.assertTrue(document_cache.peek(string, ("semantic_unit_tokens", "javascript")))
+    self.assertEqual(result["string"], "d + e")
+
 if __name__ == "__main__":
   unittest.main()
\ No newline at end of file
@@ -1,6 +1,7 @@
 import unittest
 
 from expand_to_symbols import *
+from expand_to_symbols import _get_quotes_mask
 
 class ExpandToSymbolTest(unittest.TestCase):
 
@@ -57,5 +58,24 @@ class ExpandToSymbolTest(unittest.TestCase):
     self.assertEqual(result["end"], 15)
     self.assertEqual(result["type"], "symbol")
 
+  def test_quotes_mask (self):
+    mask = _get_quotes_mask("f+\"oob\"+bar+'(x'")
+    self.assertEqual(mask.find(4), (2, 7))
+    self.assertEqual(mask.find(7), None)
+    self.assertEqual(mask.find(13), (12, 16))
+
+  def test_skip_long_strings (self):
+    string = "f(a, \"" + "(" * 5000 + "\", b" + ")" * 3
+    result = expand_to_symbols(string, 3, 3);
+    self.assertEqual(result["start"], 2)
+    self.assertEqual(result["end"], len(string) - 3)
+
+  def test_skip_symbols_in_comments (self):
+    string = "f(a, // b (\n  c)"
+    result = expand_to_symbols(string, 3, 3, "javascript");
+    self.assertEqual((result["start"], result["end"]), (2, 15))
+    result = expand_to_symbols("x = {a, % b }\n c}", 5, 5, "latex");
+    self.assertEqual(result["string"], "a, % b }\n c")
+
 if __name__ == "__main__":
   unittest.main()
\ No newline at end of file
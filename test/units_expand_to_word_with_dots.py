@@ -9,5 +9,15 @@ class WordWithDotsTest(unittest.TestCase):
     self.assertEqual(result["end"], 7)
     self.assertEqual(result["string"], "foo.bar")
 
+  def test_long_word (self):
+    string = "(" + "a.b" * 1000 + ")"
+    result = expand_to_word_with_dots(string, 1500, 1500);
+    self.assertEqual(result["start"], 1)
+    self.assertEqual(result["end"], 3001)
+
+  def test_selection_not_in_set (self):
+    result = expand_to_word_with_dots("foo bar", 2, 5);
+    self.assertEqual(result, None)
+
 if __name__ == "__main__":
   unittest.main()
\ No newline at end of file
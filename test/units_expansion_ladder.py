@@ -0,0 +1,145 @@
+import threading
+import unittest
+
+from expansion_ladder import *
+from text_window import TextBuffer
+import expand_region_handler
+
+def _failing_buffer(string):
+  def fetch(begin, end):
+    raise AssertionError("the expansion should be cached")
+  return TextBuffer(len(string), fetch)
+
+class ExpansionLadderTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(self):
+    with open ("test/snippets/integration_01.txt", "r") as myfile:
+      self.string1 = myfile.read()
+
+  def test_cache_expansion (self):
+    cache = LadderCache()
+    self.assertEqual(cache.get((1, 1)), (False, None))
+    cache.add((1, 1), {"start": 0, "end": 3})
+    cache.add((0, 3), None)
+    self.assertEqual(cache.get((1, 1)), (True, {"start": 0, "end": 3}))
+    self.assertEqual(cache.get((0, 3)), (True, None))
+    self.assertEqual(cache.get((0, 4)), (False, None))
+
+  def test_shrink (self):
+    cache = LadderCache()
+    cache.add((1, 1), {"start": 0, "end": 3})
+    cache.add((0, 3), {"start": 0, "end": 8})
+    self.assertEqual(cache.shrink((0, 8)), (0, 3))
+    self.assertEqual(cache.shrink((0, 3)), (1, 1))
+    self.assertEqual(cache.shrink((1, 1)), None)
+
+  def test_same_results_as_expand (self):
+    region = (7, 7)
+    for i in range(6):
+      expected = expand_region_handler.expand(self.string1, region[0], region[1])
+      result = expand_region_handler.expand_many(self.string1, [region], token="ladder:1")[0]
+      cached = expand_region_handler.expand_many(self.string1, [region], token="ladder:1")[0]
+      self.assertEqual(result, expected)
+      # the ladder keeps the region of the result, without the document
+      self.assertEqual(cached, result)
+      if result is None:
+        break
+      region = (result["start"], result["end"])
+
+  def test_fetch_only_if_not_cached (self):
+    calls = []
+    def fetch(begin, end):
+      calls.append((begin, end))
+      return self.string1[begin:end]
+    buffer = TextBuffer(len(self.string1), fetch)
+    expand_region_handler.expand_many(buffer, [(7, 7)], token="ladder:2")
+    fetched = len(calls)
+    self.assertTrue(fetched > 0)
+    expand_region_handler.expand_many(buffer, [(7, 7)], token="ladder:2")
+    self.assertEqual(len(calls), fetched)
+    buffer = TextBuffer(len(self.string1), fetch)
+    expand_region_handler.expand_many(buffer, [(7, 7)], token="ladder:3")
+    self.assertTrue(len(calls) > fetched)
+
+  def test_shrink_many (self):
+    result = expand_region_handler.expand_many(self.string1, [(7, 7)], token="ladder:4")[0]
+    self.assertEqual(expand_region_handler.shrink_many([(result["start"], result["end"])], token="ladder:4"), [(7, 7)])
+    self.assertEqual(expand_region_handler.shrink_many([(7, 7)], token="ladder:4"), [None])
+
+  def test_prefetch (self):
+    expand_region_handler.prefetch_many(self.string1, [(7, 7)], token="ladder:5")
+    buffer = _failing_buffer(self.string1)
+    result = expand_region_handler.expand_many(buffer, [(7, 7)], token="ladder:5")[0]
+    self.assertEqual(result["type"], "subword")
+
+  def test_cancel_prefetch (self):
+    expand_region_handler.prefetch_many(self.string1, [(7, 7)], token="ladder:6", is_cancelled=lambda: True)
+    self.assertEqual(expand_region_handler.shrink_many([(6, 9)], token="ladder:6"), [None])
+
+  def test_add_known_result (self):
+    cache = LadderCache()
+    cache.add((1, 1), {"start": 0, "end": 3})
+    cache.add((1, 1), {"start": 0, "end": 3})
+    cache.add((0, 3), None)
+    self.assertEqual(cache.shrink((0, 3)), (1, 1))
+    self.assertEqual(cache.get((0, 3)), (True, None))
+
+  def test_expand_within_budget (self):
+    results = expand_region_handler.expand_many_within(self.string1, [(7, 7)], token="ladder:7", budget=10)
+    self.assertEqual(results[0]["type"], "subword")
+    # served from the cache
+    buffer = _failing_buffer(self.string1)
+    results = expand_region_handler.expand_many_within(buffer, [(7, 7)], token="ladder:7", budget=0)
+    self.assertEqual(results[0]["type"], "subword")
+
+  def test_exceed_budget (self):
+    string = "(" + "a, " * 500000 + "\n)"
+    results = expand_region_handler.expand_many_within(string, [(5, 5), (700, 702)], token="ladder:8", budget=0)
+    self.assertEqual(results, None)
+
+  def test_wait_for_running_worker (self):
+    # the worker expands until it is released
+    release = threading.Event()
+    expand = expand_region_handler._expand
+    def blocked_expand(*args):
+      release.wait()
+      return expand(*args)
+    expand_region_handler._expand = blocked_expand
+    try:
+      string = "foo bar"
+      results = expand_region_handler.expand_many_within(string, [(5, 5)], token="ladder:9", budget=0)
+      self.assertEqual(results, None)
+      worker = expand_region_handler._workers[("ladder:9", "")][0]
+      results = expand_region_handler.expand_many_within(string, [(5, 5)], token="ladder:9", budget=0)
+      self.assertEqual(results, None)
+      # no second worker was started
+      self.assertTrue(expand_region_handler._workers[("ladder:9", "")][0] is worker)
+      release.set()
+      worker.join()
+    finally:
+      expand_region_handler._expand = expand
+    results = expand_region_handler.expand_many_within(string, [(5, 5)], token="ladder:9", budget=0)
+    self.assertEqual(results[0].get_string(string), "bar")
+
+  def test_expand_snapshot (self):
+    string = "foo bar"
+    buffer = TextBuffer(len(string), lambda begin, end: string[begin:end])
+    snapshot = expand_region_handler._get_snapshot(buffer)
+    self.assertFalse(snapshot is buffer)
+    self.assertEqual(snapshot.text(), string)
+
+  def test_clear_caches (self):
+    expand_region_handler.expand_many(self.string1, [(7, 7)], token="ladder:10")
+    expand_region_handler.clear_caches()
+    self.assertEqual(expand_region_handler._ladders.get("ladder:10", "").get((7, 7)), (False, None))
+
+  def test_evict_old_versions (self):
+    caches = LadderCaches(size=2)
+    first = caches.get("1:1", "")
+    caches.get("1:2", "")
+    caches.get("1:3", "")
+    self.assertFalse(caches.get("1:1", "") is first)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+import unittest
+
+import expand_region_handler
+
+_LOADED_MODULES_SCRIPT = """
+import sys
+import expand_region_handler
+import patterns
+expand_region_handler.expand("foo bar", 1, 1, "python")
+print(" ".join(sorted(sys.modules)))
+print(len(patterns._compiled))
+"""
+
+class LanguagesTest(unittest.TestCase):
+
+  def test_load_only_used_languages (self):
+    output = subprocess.check_output([sys.executable, "-c", _LOADED_MODULES_SCRIPT])
+    modules, compiled = output.decode("utf-8").strip().split("\n")
+    modules = modules.split()
+    self.assertTrue("python" in modules)
+    self.assertTrue("javascript" in modules)
+    self.assertFalse("latex" in modules)
+    self.assertFalse("expand_to_xml_node" in modules)
+    self.assertTrue(0 < int(compiled) < 20)
+
+  def test_same_module_for_unknown_languages (self):
+    module = expand_region_handler._get_language_module("")
+    self.assertTrue(expand_region_handler._get_language_module("unknown") is module)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from line_index import *
+import document_cache
+
+class LineIndexTest(unittest.TestCase):
+
+  def test_line_starts (self):
+    index = LineIndex("aa\nbbb\n\nc")
+    self.assertEqual(list(index.starts), [0, 3, 7, 8])
+
+  def test_get_line (self):
+    index = LineIndex("aa\nbbb\n\nc")
+    self.assertEqual(index.get_line(4, 4), {"start": 3, "end": 6})
+    self.assertEqual(index.get_line(3, 3), {"start": 3, "end": 6})
+    self.assertEqual(index.get_line(6, 6), {"start": 3, "end": 6})
+    self.assertEqual(index.get_line(7, 7), {"start": 7, "end": 7})
+    self.assertEqual(index.get_line(1, 4), {"start": 0, "end": 6})
+
+  def test_get_line_at_the_borders (self):
+    index = LineIndex("aa\nbbb\n\nc")
+    self.assertEqual(index.get_line(0, 0), {"start": 0, "end": 2})
+    self.assertEqual(index.get_line(9, 9), {"start": 8, "end": 9})
+    self.assertEqual(index.get_line(11, 11), {"start": 8, "end": 11})
+
+  def test_scanner (self):
+    scanner = LineScanner("aa\nbbb\n\nc")
+    self.assertEqual(scanner.get_line(4, 4), {"start": 3, "end": 6})
+    self.assertEqual(scanner.get_line(7, 7), {"start": 7, "end": 7})
+    self.assertEqual(scanner.get_line(0, 0), {"start": 0, "end": 2})
+    self.assertEqual(scanner.get_line(9, 9), {"start": 8, "end": 9})
+    self.assertEqual(scanner.get_line(11, 11), {"start": 8, "end": 11})
+
+  def test_build_index_once_it_pays_off (self):
+    string = "a" * 3000 + "\n" + "b" * 3000
+    self.assertTrue(isinstance(get(string), LineScanner))
+    get(string).get_line(10, 10)
+    get(string).get_line(4000, 4000)
+    get(string).get_line(5000, 5000)
+    self.assertTrue(isinstance(get(string), LineIndex))
+    self.assertTrue(get(string) is get(string))
+    document_cache.clear()
+
+  def test_reuse_index_of_same_version (self):
+    string = "a\n" * 2000
+    copy = "".join(list(string))
+    document_cache.bind(string, "1:1")
+    index = document_cache.get(string, "line_index", LineIndex)
+    document_cache.bind(copy, "1:1")
+    self.assertTrue(get(copy) is index)
+    document_cache.clear()
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from literal_index import *
+import document_cache
+from expand_to_symbols import expand_to_symbols
+
+class LiteralIndexTest(unittest.TestCase):
+
+  def tearDown(self):
+    document_cache.clear()
+
+  def test_find_literal (self):
+    index = LiteralIndex([(2, 5), (10, 14)], [(20, 30)])
+    self.assertEqual(index.find_literal(1), None)
+    self.assertEqual(index.find_literal(2), (2, 5))
+    self.assertEqual(index.find_literal(4), (2, 5))
+    self.assertEqual(index.find_literal(5), None)
+    self.assertEqual(index.find_literal(25), (20, 30))
+    self.assertEqual(index.comments.find(12), None)
+
+  def test_join_spans (self):
+    index = SpanIndex([(5, 8), (0, 3), (3, 4), (6, 10)])
+    self.assertEqual(list(zip(index.starts, index.ends)), [(0, 4), (5, 10)])
+
+  def test_mask (self):
+    index = LiteralIndex([(2, 5)], [(10, 20)])
+    is_masked = index.get_mask(12, 14)
+    self.assertTrue(is_masked(3))
+    self.assertFalse(is_masked(11))
+    self.assertFalse(is_masked(7))
+
+  def test_skip_brackets_in_comments (self):
+    string = "f(a, /* ) */ b)" + " " * 3000
+    document_cache.put(string, "literals", LiteralIndex([], [(5, 12)]))
+    result = expand_to_symbols(string, 3, 3)
+    self.assertEqual((result["start"], result["end"]), (2, 14))
+
+  def test_expand_inside_comment (self):
+    string = "f(a, /* (b) */ c)" + " " * 3000
+    document_cache.put(string, "literals", LiteralIndex([], [(5, 14)]))
+    result = expand_to_symbols(string, 9, 9)
+    self.assertEqual((result["start"], result["end"]), (9, 10))
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+import plugin_settings
+
+class PluginSettingsTest(unittest.TestCase):
+
+  def test_defaults (self):
+    settings = plugin_settings.Settings()
+    self.assertEqual(settings.force_soft_undo_integration, True)
+    self.assertEqual(settings.selection_history_max_depth, 100)
+    self.assertEqual(settings.persist_selection_history, False)
+    self.assertEqual(settings.scope_selectors, {})
+    self.assertEqual(settings.native_search, True)
+    self.assertEqual(settings.scope_literals, True)
+    self.assertEqual(settings.long_line_threshold, 10000)
+
+  def test_update (self):
+    default = plugin_settings.current
+    try:
+      plugin_settings.update({"selection_history_max_depth": "5"},
+                             {"scope_selectors": {"python": ["source.python"]}})
+      self.assertEqual(plugin_settings.current.selection_history_max_depth, 5)
+      self.assertEqual(plugin_settings.current.fallback_scope_selectors,
+                       {"python": ["source.python"]})
+    finally:
+      plugin_settings.current = default
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import search
+import document_cache
+import expand_region_handler
+from text_window import TextBuffer
+
+class PythonBackend(object):
+  """Answers the searches like a native backend, counts the searches."""
+
+  def __init__(self, string):
+    self.string = string
+    self.searches = 0
+
+  def find_all(self, regex):
+    self.searches += 1
+    return [(m.start(), m.end()) for m in regex.finditer(self.string)]
+
+class SearchTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(self):
+    with open ("test/snippets/integration_01.txt", "r") as myfile:
+      self.string1 = myfile.read()
+
+  def tearDown(self):
+    document_cache.clear()
+
+  def test_finditer (self):
+    import re
+    regex = re.compile("a+")
+    self.assertEqual(list(search.finditer("xaa a", regex)), [(1, 3), (4, 5)])
+    self.assertEqual(list(search.finditer("xaa a", regex, 2, 5)), [(2, 3), (4, 5)])
+
+  def test_backend (self):
+    import re
+    string = "x" * 3000 + "aa a"
+    backend = PythonBackend(string)
+    search.attach(string, backend)
+    regex = re.compile("a+")
+    self.assertEqual(list(search.finditer(string, regex, 3001)), [(3003, 3004)])
+    self.assertEqual(backend.searches, 1)
+
+  def test_portable_patterns (self):
+    import patterns
+    # the patterns, which are searched natively
+    for language in [None, "javascript", "python", "html"]:
+      self.assertTrue(search.is_portable(patterns.get_with_comments("string_literals", language)))
+      self.assertTrue(search.is_portable(patterns.get_with_comments("symbols_quotes", language)))
+    self.assertTrue(search.is_portable(patterns.get("latex_begin_end")))
+    self.assertTrue(search.is_portable(patterns.get_tag("div")))
+    # lookbehind, anchors and boundaries are searched with python
+    self.assertFalse(search.is_portable(patterns.get_with_comments("string_literals", "latex")))
+    self.assertFalse(search.is_portable(patterns.get("latex_exclusive_begin_end")))
+    self.assertFalse(search.is_portable(patterns.get("trim")))
+    import re
+    self.assertFalse(search.is_portable(re.compile(r"\bfoo")))
+    self.assertTrue(search.is_portable(re.compile(r"[^\n]*")))
+
+  def test_non_portable_patterns_are_searched_with_python (self):
+    import re
+    string = "x" * 3000 + "% a\n%b"
+    backend = PythonBackend(string)
+    search.attach(string, backend)
+    regex = re.compile(r"(?<!\\)%[^\n]*")
+    self.assertEqual(list(search.finditer(string, regex)), [(3000, 3003), (3004, 3006)])
+    self.assertEqual(backend.searches, 0)
+
+  def test_same_results_as_python (self):
+    string = self.string1 * 200
+    # another string with the same text, which is searched with python
+    python_string = "".join(list(string))
+    backend = PythonBackend(string)
+    buffer = TextBuffer(len(string), lambda begin, end: string[begin:end],
+                        lambda text: search.attach(text, backend))
+    for language in ["", "python", "html", "latex"]:
+      for position in range(0, len(self.string1), 11):
+        region = (position, position)
+        for i in range(6):
+          expected = expand_region_handler.expand(python_string, region[0], region[1], language)
+          result = expand_region_handler.expand_many(buffer, [region], language)[0]
+          self.assertEqual(result, expected)
+          if result is None:
+            break
+          region = (result["start"], result["end"])
+    self.assertTrue(backend.searches > 0)
+
+if __name__ == "__main__":
+  unittest.main()
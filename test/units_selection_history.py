@@ -0,0 +1,81 @@
+import unittest
+
+from selection_history import *
+
+class SelectionHistoryTest(unittest.TestCase):
+
+  def test_pop_previous_region (self):
+    history = SelectionHistory()
+    history.push(1, "1:1", [(5, 5)], [(4, 7)])
+    history.push(1, "1:1", [(4, 7)], [(2, 9)])
+    self.assertEqual(history.pop(1, "1:1", [(2, 9)]), [(4, 7)])
+    self.assertEqual(history.pop(1, "1:1", [(4, 7)]), None)
+
+  def test_pop_previous_regions (self):
+    history = SelectionHistory()
+    history.push(1, "1:1", [(5, 5), (20, 20)], [(4, 7), (18, 22)])
+    history.push(1, "1:1", [(4, 7), (18, 22)], [(2, 9), (15, 25)])
+    self.assertEqual(history.pop(1, "1:1", [(2, 9), (15, 25)]), [(4, 7), (18, 22)])
+    self.assertEqual(history.pop(1, "1:1", [(4, 7), (18, 22)]), None)
+
+  def test_restart_if_selection_moved (self):
+    history = SelectionHistory()
+    history.push(1, "1:1", [(5, 5)], [(4, 7)])
+    history.push(1, "1:1", [(10, 10)], [(8, 12)])
+    history.push(1, "1:1", [(8, 12)], [(0, 20)])
+    self.assertEqual(history.pop(1, "1:1", [(0, 20)]), [(8, 12)])
+    self.assertEqual(history.pop(1, "1:1", [(8, 12)]), None)
+
+  def test_restart_if_regions_merged (self):
+    history = SelectionHistory()
+    history.push(1, "1:1", [(5, 5), (9, 9)], [(4, 7), (8, 10)])
+    history.push(1, "1:1", [(4, 7), (8, 10)], [(0, 12)])
+    history.push(1, "1:1", [(0, 12)], [(0, 20)])
+    self.assertEqual(history.pop(1, "1:1", [(0, 20)]), [(0, 12)])
+    self.assertEqual(history.pop(1, "1:1", [(0, 12)]), None)
+
+  def test_clear_if_buffer_changed (self):
+    history = SelectionHistory()
+    history.push(1, "1:1", [(5, 5)], [(4, 7)])
+    history.push(1, "1:1", [(4, 7)], [(2, 9)])
+    self.assertEqual(history.pop(1, "1:2", [(2, 9)]), None)
+    self.assertEqual(len(history), 0)
+
+  def test_clear_if_selection_is_different (self):
+    history = SelectionHistory()
+    history.push(1, "1:1", [(5, 5), (20, 20)], [(4, 7), (18, 22)])
+    history.push(1, "1:1", [(4, 7), (18, 22)], [(2, 9), (15, 25)])
+    self.assertEqual(history.pop(1, "1:1", [(2, 9)]), None)
+    self.assertEqual(history.pop(1, "1:1", [(2, 9), (15, 25)]), None)
+
+  def test_keep_views_apart (self):
+    history = SelectionHistory()
+    history.push(1, "1:1", [(5, 5)], [(4, 7)])
+    history.push(1, "1:1", [(4, 7)], [(2, 9)])
+    history.push(2, "1:1", [(4, 7)], [(0, 9)])
+    self.assertEqual(history.pop(1, "1:1", [(2, 9)]), [(4, 7)])
+    history.discard(2)
+    self.assertEqual(len(history), 1)
+    self.assertFalse(2 in history)
+
+  def test_max_depth (self):
+    history = SelectionHistory(max_depth=2)
+    history.push(1, "1:1", [(5, 5)], [(4, 6)])
+    history.push(1, "1:1", [(4, 6)], [(3, 7)])
+    history.push(1, "1:1", [(3, 7)], [(2, 8)])
+    self.assertEqual(history.pop(1, "1:1", [(2, 8)]), [(3, 7)])
+    self.assertEqual(history.pop(1, "1:1", [(3, 7)]), None)
+
+  def test_dump_and_load (self):
+    history = SelectionHistory()
+    history.push(1, "1:1", [(5, 5), (20, 20)], [(4, 7), (18, 22)])
+    history.push(1, "1:1", [(4, 7), (18, 22)], [(2, 9), (15, 25)])
+    data = history.dump(1)
+    self.assertEqual(data["hash"], "1:1")
+    self.assertEqual(data["stacks"], [[[4, 7], [2, 9]], [[18, 22], [15, 25]]])
+    restored = SelectionHistory()
+    restored.load(1, data)
+    self.assertEqual(restored.pop(1, "1:1", [(2, 9), (15, 25)]), [(4, 7), (18, 22)])
+
+if __name__ == "__main__":
+  unittest.main()
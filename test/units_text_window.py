@@ -0,0 +1,164 @@
+import unittest
+
+from text_window import *
+import document_cache
+import expand_region_handler
+from literal_index import LiteralIndex
+
+class TextWindowTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(self):
+    with open ("test/snippets/integration_01.txt", "r") as myfile:
+      self.string1 = myfile.read()
+
+  def test_line_window (self):
+    buffer = TextBuffer.from_string("aaa\nbbb ccc\nddd")
+    window = buffer.line_window(6, 6)
+    self.assertEqual(window.begin, 2)
+    self.assertEqual(window.end, 13)
+    self.assertEqual(window.string, "a\nbbb ccc\nd")
+
+  def test_line_window_at_the_borders (self):
+    buffer = TextBuffer.from_string("aaa bbb")
+    window = buffer.line_window(2, 2)
+    self.assertEqual(window.begin, 0)
+    self.assertEqual(window.end, 7)
+    self.assertEqual(window.string, "aaa bbb")
+
+  def test_grow_to_long_lines (self):
+    string = "a\n" + "b" * 2000 + "\nc"
+    buffer = TextBuffer(len(string), lambda begin, end: string[begin:end])
+    window = buffer.line_window(1000, 1000)
+    self.assertEqual(window.begin, 0)
+    self.assertEqual(window.end, len(string))
+    self.assertEqual(window.string, string)
+
+  def test_long_line_segments (self):
+    string = "a = 1;" * 1000 + "foo(barBaz, 2);" + "b = 2;" * 1000
+    buffer = TextBuffer(len(string), lambda begin, end: string[begin:end], max_line_length=1000)
+    window = buffer.line_window(6008, 6008)
+    # padded like the lines
+    self.assertEqual(window.string, "1;foo(barBaz, 2);b")
+    self.assertEqual(window.begin, 5998)
+    # the whole segment is selected, continue with the next one
+    window = buffer.line_window(6000, 6014)
+    self.assertEqual(window.string, "1;a = 1;foo(barBaz, 2);b = 2;b")
+    self.assertEqual(window.begin, 5992)
+
+  def test_long_line_segments_skip_literals (self):
+    string = "a = 1;" * 1000 + "f('x;y', 2);" + "b = 2;" * 1000
+    literals = LiteralIndex([(6002, 6007)], [])
+    buffer = TextBuffer(len(string), lambda begin, end: string[begin:end],
+                        max_line_length=1000, get_literals=lambda: literals)
+    window = buffer.line_window(6009, 6009)
+    self.assertEqual(window.string, "1;f('x;y', 2);b")
+
+  def test_long_line_segments_skip_literals_without_scopes (self):
+    # the literals are taken from the string index of the text
+    string = "a = 1;" * 1000 + "f(\"a;b\", 2);" + "b = 2;" * 1000
+    buffer = TextBuffer(len(string), lambda begin, end: string[begin:end],
+                        max_line_length=1000)
+    window = buffer.line_window(6004, 6004)
+    self.assertEqual(window.string, "1;f(\"a;b\", 2);b")
+    region = (6004, 6004)
+    for i in range(4):
+      expected = expand_region_handler.expand(string, region[0], region[1])
+      result = expand_region_handler.expand_many(buffer, [region])[0]
+      self.assertEqual(result, expected)
+      region = (result["start"], result["end"])
+    self.assertEqual(result["string"], "\"a;b\", 2")
+
+  def test_cached_data_of_version (self):
+    string = "a = 1;\n" * 1000
+    buffer = TextBuffer(len(string), lambda begin, end: string[begin:end],
+                        on_text=lambda text: document_cache.bind(text, "7:1"), version="7:1")
+    self.assertEqual(buffer.get_cached("key", len), len(string))
+    def fetch(begin, end):
+      raise AssertionError("the data should be cached")
+    buffer = TextBuffer(len(string), fetch, version="7:1")
+    self.assertEqual(buffer.get_cached("key", len), len(string))
+    document_cache.clear()
+
+  def test_long_line_without_separators (self):
+    string = "a" * 5000
+    buffer = TextBuffer(len(string), lambda begin, end: string[begin:end], max_line_length=1000)
+    window = buffer.line_window(2500, 2500)
+    self.assertEqual((window.begin, window.end), (2000, 3000))
+
+  def test_expand_long_line (self):
+    string = "a = 1;" * 100000 + "foo(barBaz, 2);" + "b = 2;" * 100000
+    fetched = []
+    def fetch(begin, end):
+      fetched.append(end - begin)
+      return string[begin:end]
+    buffer = TextBuffer(len(string), fetch, max_line_length=1000)
+    region = (600008, 600008)
+    results = []
+    for i in range(4):
+      result = expand_region_handler.expand_many(buffer, [region])[0]
+      results.append(result["string"])
+      region = (result["start"], result["end"])
+    self.assertEqual(results, ["Baz", "barBaz", "barBaz, 2", "(barBaz, 2)"])
+    # the segments are cut outside of the literals of the whole text, which is
+    # fetched once
+    self.assertEqual(fetched.count(len(string)), 1)
+    self.assertTrue(max(size for size in fetched if size != len(string)) < 2 * 1000 + 100)
+
+  def test_literals_spanning_the_window (self):
+    string = "def f():\n    \"\"\"Return it.\n" + "    text\n" * 100 + "    \"\"\"\n    return 1\n"
+    buffer = TextBuffer.from_string(string)
+    region = (20, 20)
+    results = []
+    for i in range(3):
+      result = expand_region_handler.expand_many(buffer, [region], language="python")[0]
+      results.append(result.get_string(string))
+      region = (result["start"], result["end"])
+    self.assertEqual(results[0], "Return it.")
+    self.assertEqual(results[1], string[16:string.rindex("\"\"\"")])
+    self.assertEqual(results[2], string[13:string.rindex("\"\"\"") + 3])
+    string = "x = `line one\nline two`;\n"
+    result = expand_region_handler.expand_many(TextBuffer.from_string(string), [(5, 13)])[0]
+    self.assertEqual(result["string"], "line one\nline two")
+
+  def test_multi_line_comments (self):
+    string = "function f() {\n  /*\n   * call g(\n   */\n  x = 1;\n}"
+    region = (string.index("x = 1;"), string.index("x = 1;") + 6)
+    result = expand_region_handler.expand_many(TextBuffer.from_string(string), [region], language="javascript")[0]
+    self.assertEqual(result["string"], string[14:-1])
+
+  def test_fetch_only_the_lines (self):
+    string = "a\n" * 10000 + "bbb\n" + "a\n" * 10000
+    fetched = []
+    def fetch(begin, end):
+      fetched.append(end - begin)
+      return string[begin:end]
+    # the literals of the lines are looked up in the string index of the whole
+    # text, which is built once per version
+    buffer = TextBuffer(len(string), fetch, version="8:1",
+                        on_text=lambda text: document_cache.bind(text, "8:1"))
+    result = expand_region_handler.expand_many(buffer, [(20001, 20001)])[0]
+    self.assertEqual(result["string"], "bbb")
+    self.assertEqual(fetched.count(len(string)), 1)
+    del fetched[:]
+    buffer = TextBuffer(len(string), fetch, version="8:1")
+    result = expand_region_handler.expand_many(buffer, [(20002, 20002)])[0]
+    self.assertEqual(result["string"], "bbb")
+    self.assertTrue(sum(fetched) < 1000)
+    document_cache.clear()
+
+  def test_same_results_as_expand (self):
+    for language in ["", "html", "python", "latex"]:
+      for position in range(0, len(self.string1), 7):
+        region = (position, position)
+        for i in range(4):
+          expected = expand_region_handler.expand(self.string1, region[0], region[1], language)
+          buffer = TextBuffer(len(self.string1), lambda begin, end: self.string1[begin:end])
+          result = expand_region_handler.expand_many(buffer, [region], language)[0]
+          self.assertEqual(result, expected)
+          if result is None:
+            break
+          region = (result["start"], result["end"])
+
+if __name__ == "__main__":
+  unittest.main()
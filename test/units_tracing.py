@@ -0,0 +1,36 @@
+import unittest
+
+import tracing
+from expand_region_handler import expand
+
+class TracingTest(unittest.TestCase):
+
+  def tearDown(self):
+    tracing.configure(False)
+    tracing.clear()
+
+  def test_disabled_by_default (self):
+    expand("foo bar", 1, 1)
+    self.assertEqual(tracing.get_events(), [])
+
+  def test_record_expansion (self):
+    tracing.configure(True)
+    expand("foo bar", 1, 1)
+    events = tracing.get_events()
+    self.assertEqual(len(events), 1)
+    _, event, fields = events[0]
+    self.assertEqual(event, "expand")
+    self.assertEqual(fields["region"], (1, 1))
+    self.assertEqual(fields["result"], (0, 3))
+    self.assertEqual(fields["type"], "word")
+    self.assertEqual(fields["steps"], ["subword", "word"])
+
+  def test_ring_buffer (self):
+    tracing.configure(True, 2)
+    for i in range(3):
+      tracing.record("event", index=i)
+    self.assertEqual([e[2]["index"] for e in tracing.get_events()], [1, 2])
+    self.assertEqual(len(tracing.format_events()), 2)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -64,5 +64,46 @@ class TrimTest(unittest.TestCase):
     self.assertEqual(result["end"], 49)
 
 
+class ExpansionResultTest(unittest.TestCase):
+
+  def test_fields (self):
+    result = create_return_obj(4, 7, "foo bar baz", "word")
+    self.assertEqual(result.string, "bar")
+    self.assertEqual(result["start"], 4)
+    self.assertEqual(result["type"], "word")
+    self.assertEqual(result.get("expand_stack"), None)
+    result["expand_stack"] = ["word"]
+    self.assertEqual(result.expand_stack, ["word"])
+
+  def test_text_follows_region (self):
+    result = create_return_obj(4, 7, "foo bar baz", "word")
+    result["start"] -= 4
+    self.assertEqual(result["string"], "foo bar")
+
+  def test_move (self):
+    result = create_return_obj(0, 3, "bar baz", "word")
+    result.move(4)
+    self.assertEqual((result.start, result.end), (4, 7))
+    self.assertEqual(result.string, "bar")
+
+  def test_no_copy_on_create (self):
+    class Source(str):
+      def __getitem__(self, key):
+        raise AssertionError("the text should not be copied")
+    result = create_return_obj(0, 3, Source("foo"), "word")
+    self.assertEqual(result.end, 3)
+
+  def test_detached (self):
+    source = "foo bar baz"
+    result = create_return_obj(4, 7, source, "word")
+    result.move(2)
+    detached = result.detached()
+    self.assertEqual(detached._source, None)
+    self.assertEqual(detached, result)
+    self.assertEqual(result.string, "bar")
+    self.assertRaises(ValueError, lambda: detached.string)
+    self.assertEqual(detached.get_string("  " + source), "bar")
+
+
 if __name__ == "__main__":
   unittest.main()
\ No newline at end of file
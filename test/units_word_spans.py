@@ -0,0 +1,41 @@
+import unittest
+
+from word_spans import *
+import expand_to_regex_set
+import patterns
+
+class WordSpansTest(unittest.TestCase):
+
+  def test_nested_spans (self):
+    spans = WordSpans("x = foo.barBaz + 1", 12, 12)
+    self.assertEqual(spans.subword()["string"], "Baz")
+    self.assertEqual(spans.word()["string"], "barBaz")
+    self.assertEqual(spans.word_with_dots()["string"], "foo.barBaz")
+
+  def test_tex_spans (self):
+    spans = WordSpans("$\\alpha_1^2$", 3, 3)
+    self.assertEqual(spans.tex_word()["string"], "alpha")
+    self.assertEqual(spans.math_command()["string"], "\\alpha_1^2")
+
+  def test_selection_outside_word (self):
+    spans = WordSpans("foo bar", 2, 5)
+    self.assertEqual(spans.subword(), None)
+    self.assertEqual(spans.word(), None)
+    self.assertEqual(spans.word_with_dots(), None)
+
+  def test_no_expansion (self):
+    spans = WordSpans("foo bar", 0, 3)
+    self.assertEqual(spans.word(), None)
+    self.assertEqual(spans.word_with_dots(), None)
+
+  def test_find_run_start (self):
+    run = expand_to_regex_set.get_run_pattern(patterns.get("word"))
+    string = "x " + "a" * 200 + " y"
+    # the run is longer than the first chunk searched backwards
+    self.assertEqual(expand_to_regex_set.find_run_start(string, 150, run), 2)
+    self.assertEqual(expand_to_regex_set.find_run_start(string, 1, run), 0)
+    self.assertEqual(expand_to_regex_set.find_run_start(string, 2, run), 2)
+    self.assertEqual(expand_to_regex_set.find_run_start("abc", 3, run), 0)
+
+if __name__ == "__main__":
+  unittest.main()
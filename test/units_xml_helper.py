@@ -88,5 +88,11 @@ class XmlHelperTest(unittest.TestCase):
     self.assertEqual(result["end"], 5)
     self.assertEqual(result["name"], "div")
 
+  def test_find_tag_with_special_name (self):
+    result = find_tag("text</axb></a.b>", "forward", "a.b")
+    self.assertEqual(result["start"], 10)
+    self.assertEqual(result["end"], 16)
+    self.assertEqual(result["name"], "a.b")
+
 if __name__ == "__main__":
   unittest.main()
\ No newline at end of file
@@ -0,0 +1,193 @@
+# Access to the text of a buffer without copying all of it.
+#
+# Most expansions (word, subword, quotes, ...) only look at the lines of the
+# selection. A TextBuffer fetches a window around the selection and doubles it
+# until it contains those lines, hence the cost of an expansion scales with
+# the size of the lines and not with the size of the document. The whole text
+# is only fetched if an expansion needs it.
+#
+# Lines longer than max_line_length (e.g. minified files) are cut into
+# segments at the statement separators around the selection, which are then
+# expanded like lines. Hence the cost stays bounded on such lines. A separator
+# inside of a string or comment is not a cut. The literals are taken from the
+# editor if it knows them, otherwise from the string index of the whole text.
+
+try:
+  # Block it from trying to import something which should not be on the python sys.path
+  # https://github.com/hktonylee/SublimeNumberKing/issues/4
+  import expand_region_handler
+  import document_cache
+  import string_index
+except:
+  from . import document_cache
+  from . import string_index
+
+# the window starts with this size around the selection
+_INITIAL_SIZE = 256
+# the subword expansion looks at two characters around the selection, which
+# might be in the neighbouring lines
+_PADDING = 2
+# a long line is cut at these characters
+_SEGMENT_SEPARATORS = ";\n"
+
+
+class TextWindow(object):
+  """A part of the text, string is the text from begin to end. The lines (or
+  the segment) of the selection are from content_begin to content_end, the
+  rest is padding."""
+  __slots__ = ("begin", "end", "string", "content_begin", "content_end")
+
+  def __init__(self, begin, end, string, content_begin=None, content_end=None):
+    self.begin = begin
+    self.end = end
+    self.string = string
+    self.content_begin = begin if content_begin is None else content_begin
+    self.content_end = end if content_end is None else content_end
+
+
+class TextBuffer(object):
+  """Lazy access to a text of the given size, fetch(begin, end) returns the
+  text between the offsets. on_text(text) is called, when the whole text is
+  fetched, e.g. to attach data to it (see search.py). get_literals() returns
+  the LiteralIndex of the text or None, it is only called to cut long
+  lines. The version identifies the text in the document_cache, once the
+  text is bound to it."""
+
+  def __init__(self, size, fetch, on_text=None, max_line_length=None,
+               get_literals=None, version=None):
+    self.size = size
+    self._fetch = fetch
+    self._on_text = on_text
+    self._get_literals = get_literals
+    self._text = None
+    # longer lines are cut into segments, None to disable it
+    self.max_line_length = max_line_length
+    self.version = version
+
+  @classmethod
+  def from_string(cls, string):
+    buffer = cls(len(string), lambda begin, end: string[begin:end])
+    buffer._text = string
+    return buffer
+
+  def text(self):
+    """Returns the whole text, it is only fetched once."""
+    if self._text is None:
+      self._text = self._fetch(0, self.size)
+      if self._on_text is not None:
+        self._on_text(self._text)
+    return self._text
+
+  def get_cached(self, key, build):
+    """Returns the data of the whole text for the key, see document_cache. If
+    it is cached for the version, the text is not fetched."""
+    if self.version is not None:
+      value = document_cache.peek_version(self.version, key)
+      if value is not None:
+        return value
+    return document_cache.get(self.text(), key, build)
+
+  def fetch(self, begin, end):
+    if self._text is not None:
+      return self._text[begin:end]
+    return self._fetch(begin, end)
+
+  def line_window(self, start, end):
+    """Returns a window containing the complete lines from start to end."""
+    size = _INITIAL_SIZE
+    while True:
+      fetch_begin = max(0, start - size)
+      fetch_end = min(self.size, end + size)
+      string = self.fetch(fetch_begin, fetch_end)
+      # the line starts behind the last linebreak before the start and ends
+      # at the first linebreak at or behind the end
+      line_start = string.rfind("\n", 0, start - fetch_begin)
+      line_end = string.find("\n", end - fetch_begin)
+      if ((line_start != -1 or fetch_begin == 0) and
+          (line_end != -1 or fetch_end == self.size)):
+        break
+      if self.max_line_length:
+        if size >= self.max_line_length:
+          return self._segment_window(start, end)
+        size = min(size * 2, self.max_line_length)
+      else:
+        size *= 2
+
+    line_start = fetch_begin + line_start + 1 if line_start != -1 else 0
+    line_end = fetch_begin + line_end if line_end != -1 else self.size
+    begin = max(0, line_start - _PADDING)
+    end = min(self.size, line_end + _PADDING)
+    if fetch_begin <= begin and end <= fetch_end:
+      string = string[begin - fetch_begin:end - fetch_begin]
+    else:
+      string = self.fetch(begin, end)
+    return TextWindow(begin, end, string, line_start, line_end)
+
+  def _segment_window(self, start, end):
+    # the segment from the separator before the selection to the separator
+    # behind it, at most half of max_line_length around the selection
+    distance = self.max_line_length // 2
+    fetch_begin = max(0, start - distance)
+    fetch_end = min(self.size, end + distance)
+    string = self.fetch(fetch_begin, fetch_end)
+    literals = self._get_literals and self._get_literals()
+    if literals is None:
+      literals = self.get_cached(("string_index", None), string_index.StringIndex)
+    find_literal = _get_literal_finder(literals, fetch_begin)
+    begin = _find_separator_before(string, start - fetch_begin, find_literal)
+    segment_end = _find_separator_behind(string, end - fetch_begin, find_literal)
+    # the whole segment is selected, continue with the next separators
+    if begin == start - fetch_begin and segment_end == end - fetch_begin:
+      begin = _find_separator_before(string, max(0, begin - 1), find_literal)
+      segment_end = _find_separator_behind(
+        string, min(len(string), segment_end + 1), find_literal)
+    content_begin = fetch_begin + begin
+    content_end = fetch_begin + segment_end
+    # padded like the lines
+    begin = max(0, begin - _PADDING)
+    segment_end = min(len(string), segment_end + _PADDING)
+    return TextWindow(fetch_begin + begin, fetch_begin + segment_end,
+                      string[begin:segment_end], content_begin, content_end)
+
+
+def _get_literal_finder(literals, offset):
+  """Returns a function, which returns the span of the literal containing a
+  position of the fetched string or None."""
+  if literals is None:
+    return None
+
+  def find_literal(pos):
+    span = literals.find_literal(offset + pos)
+    if span is None:
+      return None
+    return span[0] - offset, span[1] - offset
+  return find_literal
+
+
+def _find_separator_before(string, index, find_literal=None):
+  """Returns the position behind the last separator before the index, which
+  is not inside of a literal, or 0."""
+  while True:
+    position = max(string.rfind(separator, 0, index)
+                   for separator in _SEGMENT_SEPARATORS)
+    span = find_literal(position) if find_literal and position != -1 else None
+    if span is None:
+      return position + 1
+    # search before the literal
+    index = max(0, span[0])
+
+
+def _find_separator_behind(string, index, find_literal=None):
+  """Returns the position of the first separator at or behind the index,
+  which is not inside of a literal, or the length of the string."""
+  while True:
+    positions = [string.find(separator, index) for separator in _SEGMENT_SEPARATORS]
+    positions = [position for position in positions if position != -1]
+    if not positions:
+      return len(string)
+    position = min(positions)
+    span = find_literal(position) if find_literal else None
+    if span is None:
+      return position
+    # search behind the literal
+    index = span[1]
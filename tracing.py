@@ -0,0 +1,52 @@
+import time
+from collections import deque
+
+# Structured tracing of the expansions.
+#
+# The trace is disabled by default and callers check tracing.enabled before
+# they create an event, hence a disabled trace only costs an attribute lookup.
+# If enabled, the events are kept in a ring buffer of fixed size, which can be
+# dumped with the expand_region_dump_trace command. Nothing is printed.
+
+try:
+  clock = time.perf_counter
+except AttributeError:  # python 2
+  clock = time.time
+
+enabled = False
+
+_events = deque(maxlen=1000)
+
+
+def configure(is_enabled, size=1000):
+  global enabled, _events
+  if size != _events.maxlen:
+    _events = deque(_events, maxlen=size)
+  enabled = is_enabled
+
+
+def record(event, **fields):
+  """Adds the event with its fields to the trace, check enabled before."""
+  _events.append((clock(), event, fields))
+
+
+def get_events():
+  return list(_events)
+
+
+def clear():
+  _events.clear()
+
+
+def format_events():
+  """Returns the events as lines of text, the oldest first."""
+  events = get_events()
+  if not events:
+    return []
+  first_time = events[0][0]
+  lines = []
+  for event_time, event, fields in events:
+    values = ", ".join("{0}={1!r}".format(k, fields[k]) for k in sorted(fields))
+    lines.append("{0:10.3f}ms {1}: {2}".format(
+      (event_time - first_time) * 1000, event, values))
+  return lines
@@ -1,9 +1,15 @@
-import re
-
-is_debug_enabled = False
+try:
+  # Block it from trying to import something which should not be on the python sys.path
+  # https://github.com/hktonylee/SublimeNumberKing/issues/4
+  import expand_region_handler
+  import line_index
+  import patterns
+except:
+  from . import line_index
+  from . import patterns
 
 def selection_contain_linebreaks(string, startIndex, endIndex):
-  linebreakRe = re.compile("(\n)")
+  linebreakRe = patterns.get("linebreak")
   part = string[startIndex:endIndex]
 
   result = linebreakRe.search(part)
@@ -12,41 +18,96 @@ def selection_contain_linebreaks(string, startIndex, endIndex):
   else:
     return False
 
+class ExpansionResult(object):
+  """The region a selection expands to.
+
+  The text of the region is only sliced from the document if it is accessed,
+  most results are just compared or dropped. A detached result has no
+  document, its text is read with get_string. The fields can also be accessed
+  like the keys of a dict, e.g. result["start"]."""
+  __slots__ = ("start", "end", "type", "expand_stack", "_source", "_offset")
+
+  _KEYS = ("start", "end", "type", "expand_stack", "string")
+
+  def __init__(self, start, end, source, type, expand_stack=None):
+    self.start = start
+    self.end = end
+    self.type = type
+    self.expand_stack = expand_stack
+    self._source = source
+    # position of the source in the document
+    self._offset = 0
+
+  @property
+  def string(self):
+    if self._source is None:
+      raise ValueError("the result is detached, use get_string(document)")
+    return self._source[self.start - self._offset:self.end - self._offset]
+
+  def get_string(self, document):
+    """Returns the text of the region in the document, a string or a
+    TextBuffer (see text_window), e.g. the current buffer."""
+    if hasattr(document, "fetch"):
+      return document.fetch(self.start, self.end)
+    return document[self.start:self.end]
+
+  def move(self, offset):
+    """Moves the region by offset, e.g. if it was expanded in a part of the
+    document, the text stays the same."""
+    self.start += offset
+    self.end += offset
+    self._offset += offset
+
+  def detached(self):
+    """Returns a copy of the result without the source, e.g. to cache it
+    without keeping the document alive or copying its text."""
+    return ExpansionResult(self.start, self.end, None, self.type, self.expand_stack)
+
+  def __getitem__(self, key):
+    if key not in self._KEYS:
+      raise KeyError(key)
+    return getattr(self, key)
+
+  def __setitem__(self, key, value):
+    if key == "string" or key not in self._KEYS:
+      raise KeyError(key)
+    setattr(self, key, value)
+
+  def __contains__(self, key):
+    return key in self._KEYS
+
+  def get(self, key, default=None):
+    if key not in self._KEYS:
+      return default
+    return getattr(self, key)
+
+  def __eq__(self, other):
+    if not isinstance(other, ExpansionResult):
+      return NotImplemented
+    return (self.start == other.start and self.end == other.end and
+            self.type == other.type and self.expand_stack == other.expand_stack)
+
+  def __ne__(self, other):
+    result = self.__eq__(other)
+    if result is NotImplemented:
+      return result
+    return not result
+
+  __hash__ = None
+
+  def __repr__(self):
+    return "ExpansionResult({0!r}, {1!r}, {2!r}, {3!r})".format(
+      self.start, self.end, self.type, self.expand_stack)
+
 def create_return_obj(start, end, string, type):
-  return {"start": start, "end": end, "string": string[start:end], "type": type}
+  return ExpansionResult(start, end, string, type)
 
 def get_line(string, startIndex, endIndex):
-  linebreakRe = re.compile(r'\n')
-
-  searchIndex = startIndex - 1;
-  while True:
-    if searchIndex < 0:
-      newStartIndex = searchIndex + 1
-      break
-    char = string[searchIndex:searchIndex+1]
-    if linebreakRe.match(char):
-      newStartIndex = searchIndex + 1
-      break
-    else:
-      searchIndex -= 1
-
-  searchIndex = endIndex;
-  while True:
-    if searchIndex > len(string) - 1:
-      newEndIndex = searchIndex
-      break
-    char = string[searchIndex:searchIndex+1]
-    if linebreakRe.match(char):
-      newEndIndex = searchIndex
-      break
-    else:
-      searchIndex += 1
-
-  return {"start": newStartIndex, "end": newEndIndex}
+  return line_index.get(string).get_line(startIndex, endIndex)
 
 def trim(string):
   # TODO can s.strip() be used for that?
-  trim = re.compile(r'^[ \t\n]*(.*?)[ \t\n]*$', re.DOTALL)
+  trim = patterns.get("trim")
   r = trim.search(string)
 
   if r:
@@ -0,0 +1,103 @@
+try:
+  # Block it from trying to import something which should not be on the python sys.path
+  # https://github.com/hktonylee/SublimeNumberKing/issues/4
+  import expand_region_handler
+  import expand_to_regex_set
+  import patterns
+  import utils
+except:
+  from . import expand_to_regex_set
+  from . import patterns
+  from . import utils
+
+# The word-like spans around a selection (subword, word, word with dots, tex
+# word and math command) are nested: all of them consist of the characters in
+# the "any_word" pattern. That run is scanned once, the spans are matched
+# within it.
+
+
+class WordSpans(object):
+  """The word-like expansions of the selection from start to end."""
+  __slots__ = ("string", "start", "end", "_before", "_is_word")
+
+  def __init__(self, string, start, end):
+    self.string = string
+    self.start = start
+    self.end = end
+    any_word = expand_to_regex_set.get_run_pattern(patterns.get("any_word"))
+    # every span is inside the run of word characters around the selection
+    self._is_word = (start == end or
+                     any_word.match(string, start, end).end() == end)
+    if self._is_word:
+      begin = expand_to_regex_set.find_run_start(string, start, any_word)
+      # the part before the selection reversed, python can't match backwards
+      self._before = string[begin:start][::-1]
+
+  def _expand(self, name, type):
+    if not self._is_word:
+      return None
+    run = expand_to_regex_set.get_run_pattern(patterns.get(name))
+    start = self.start
+    end = self.end
+    string = self.string
+    if start != end and run.match(string, start, end).end() != end:
+      return None
+    new_start = start - run.match(self._before).end()
+    new_end = max(end, run.match(string, end).end())
+    if start == new_start and end == new_end:
+      return None
+    return utils.create_return_obj(new_start, new_end, string, type)
+
+  def subword(self):
+    # if it is an upper case word search for upper case chars
+    # else search for lower case chars
+    if _is_inside_upper(self.string, self.start, self.end):
+      result = self._expand("subword_upper", "subword")
+    else:
+      result = self._expand("subword_lower", "subword")
+    if result is None:
+      return None
+    string = self.string
+    # check if it is prefixed by an upper char
+    # expand from camelC|ase| to camel|Case|
+    if patterns.get("subword_upper").match(string[result.start-1:result.start]):
+      result.start -= 1
+    # check that it is a "true" subword, i.e. inside a word
+    if not _is_true_subword(string, result):
+      return None
+    return result
+
+  def word(self):
+    return self._expand("word", "word")
+
+  def word_with_dots(self):
+    return self._expand("word_with_dots", "word_with_dots")
+
+  def tex_word(self):
+    return self._expand("tex_word", "tex_word")
+
+  def math_command(self):
+    return self._expand("tex_math_command", "tex_math_command")
+
+
+def _is_true_subword(string, result):
+  start = result.start
+  end = result.end
+  char_before = string[start-1:start]
+  char_after = string[end:end+1]
+  neighbour = patterns.get("subword_neighbour")
+  is_word_before = neighbour.match(char_before)
+  is_word_after = neighbour.match(char_after)
+  return bool(is_word_before or is_word_after)
+
+
+def _is_inside_upper(string, start, end):
+  if start != end:
+    return string[start:end].isupper()
+  start = max(0, start-2)
+  end = min(end + 2, len(string))
+  sub_str = string[start:end]
+  contains_upper = patterns.get("two_upper").search(sub_str)
+  sub_str = sub_str[1:3]
+  contains_lower = patterns.get("subword_lower").search(sub_str)
+  return bool(contains_upper) and not bool(contains_lower)